@@ -140,22 +140,21 @@ class APIClient:
             logger.warning(f"post_event error: {e}")
             return None
 
-    def upload_snapshot(self, event_id: int, image_path: str) -> bool:
+    def upload_snapshot(self, event_id: int, image: str | bytes) -> bool:
         """
         POST /events/{event_id}/snapshot to attach a JPEG snapshot.
+        `image` is either a path to a JPEG file or the encoded JPEG bytes.
         Returns True on success.
         """
         if not self._token:
             return False
         url = f"{self.server_url}/events/{event_id}/snapshot"
         try:
-            with open(image_path, "rb") as f:
-                resp = requests.post(
-                    url,
-                    files={"file": ("snapshot.jpg", f, "image/jpeg")},
-                    headers={"X-Device-Token": self._token},
-                    timeout=self.REQUEST_TIMEOUT,
-                )
+            if isinstance(image, bytes):
+                resp = self._post_snapshot(url, image)
+            else:
+                with open(image, "rb") as f:
+                    resp = self._post_snapshot(url, f)
             if resp.status_code in (200, 201):
                 return True
             else:
@@ -165,6 +164,14 @@ class APIClient:
             logger.warning(f"upload_snapshot error: {e}")
             return False
 
+    def _post_snapshot(self, url: str, body) -> requests.Response:
+        return requests.post(
+            url,
+            files={"file": ("snapshot.jpg", body, "image/jpeg")},
+            headers={"X-Device-Token": self._token},
+            timeout=self.REQUEST_TIMEOUT,
+        )
+
     def register_callbacks(self, on_armed_change=None, on_config_change=None):
         """Register callbacks for state/config changes received via WebSocket."""
         self._on_armed_change  = on_armed_change
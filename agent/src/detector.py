@@ -2,29 +2,80 @@
 detector.py — Wraps YOLOv8 (Ultralytics) for person-only detection.
 
 Responsibilities:
-  1. Load the model once at startup (GPU/CPU auto-selected).
-  2. Run inference on a single OpenCV frame.
-  3. Return a clean list of Detection namedtuples (box, confidence).
+  1. Load the model once at startup (GPU/CPU auto-selected; on GPU a
+     TensorRT engine is preferred over the .pt — INT8 if export_int8.py
+     has been run, otherwise an FP16 engine exported on first start).
+  2. Run inference on a single OpenCV frame, or a micro-batch of frames.
+  3. Return the detections as one contiguous NumPy record array
+     (box, confidence) per frame.
 """
 
 import os
-from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import numpy as np
 import torch
 from ultralytics import YOLO
+from ultralytics.utils.ops import non_max_suppression
 
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
 import config
 
-# A simple data container for each detected person in a frame.
-Detection = namedtuple("Detection", ["x1", "y1", "x2", "y2", "confidence"])
+# One record per detected person in a frame. detect() returns an np.recarray
+# of this dtype: rows still read as `det.x1 … det.confidence`, while the whole
+# set is a single contiguous buffer (`dets.confidence` is a float32 column).
+DETECTION_DTYPE = np.dtype([
+    ("x1", "i4"), ("y1", "i4"), ("x2", "i4"), ("y2", "i4"),
+    ("confidence", "f4"),
+])
+
+
+def _empty_detections() -> np.recarray:
+    return np.recarray((0,), dtype=DETECTION_DTYPE)
+
+
+@torch.jit.script
+def _letterbox(raw: torch.Tensor, size: int, nh: int, nw: int, top: int, left: int) -> torch.Tensor:
+    """
+    (B, H, W, 3) uint8 BGR → (B, 3, size, size) float RGB in [0, 1],
+    resized to (nh, nw) and centre-padded with Ultralytics' grey (114).
+    Scripted so the whole chain runs as one fused graph on the device.
+    """
+    x = raw.flip(-1).permute(0, 3, 1, 2).float().div(255.0)
+    x = torch.nn.functional.interpolate(x, size=[nh, nw], mode="bilinear", align_corners=False)
+    return torch.nn.functional.pad(
+        x, [left, size - nw - left, top, size - nh - top], value=114.0 / 255.0
+    )
+
+
+def _preload_file(path: Path, chunk_size: int = 4 << 20, workers: int = 4) -> None:
+    """
+    Pull `path` into the OS page cache with parallel chunked reads, so the
+    (sequential) weight loader that runs next reads from memory, not disk.
+    """
+    if not path.exists():
+        return
+    size = path.stat().st_size
+    with open(path, "rb") as f:
+        fd = f.fileno()
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        if hasattr(os, "pread"):
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for _ in pool.map(lambda off: os.pread(fd, chunk_size, off),
+                                  range(0, size, chunk_size)):
+                    pass
+        else:
+            # Windows: no pread — a plain sequential read still warms the cache
+            while f.read(chunk_size):
+                pass
 
 
 class PersonDetector:
     """
-    Loads a YOLOv8 model and exposes a single `detect(frame)` method.
+    Loads a YOLOv8 model and exposes `detect(frame)` / `detect_batch(frames)`.
 
     Parameters
     ----------
@@ -54,22 +105,131 @@ class PersonDetector:
             device = "cpu"
         self.device = device
 
+        # Let cuDNN benchmark conv algorithms for our fixed input shape; the
+        # winners are cached during the warm-up at the end of __init__.
+        if device == "cuda":
+            torch.backends.cudnn.benchmark = True
+
         # ── Load model ──────────────────────────────────────────────────────
         # If weights exist locally, Ultralytics loads them directly.
         # Otherwise it downloads them from the official Ultralytics CDN.
         print(f"[INFO] Loading model '{model_name}' on device='{device}' …")
+        _preload_file(model_path)
         self.model = YOLO(str(model_path) if model_path.exists() else model_name)
-        self.model.to(device)
 
         # Cache the model to models/ so future runs are instant
         if not model_path.exists():
             self.model.save(str(model_path))
             print(f"[INFO] Model weights saved to {model_path}")
 
+        # ── TensorRT engine (CUDA only) ─────────────────────────────────────
+        # Preference: INT8 engine (built offline by export_int8.py) → FP16
+        # engine (exported here on first run) → the .pt as CPU / no-TRT fallback.
+        engine_path = None
+        if device == "cuda" and config.USE_TENSORRT:
+            int8_path = model_path.with_suffix(".int8.engine")
+            engine_path = int8_path if int8_path.exists() else self._ensure_engine(model_path)
+
+        if engine_path is not None:
+            print(f"[INFO] Using TensorRT engine {engine_path.name}")
+            _preload_file(engine_path)
+            self.model = YOLO(str(engine_path), task="detect")
+        else:
+            self.model.to(device)
+
+        # ── Persistent inference pipeline ───────────────────────────────────
+        # One predict() call builds the Ultralytics predictor and its
+        # AutoBackend (wrapping either the .pt or the .engine). detect() then
+        # feeds that backend directly, skipping the per-call predict() setup,
+        # and reuses the buffers below instead of allocating per frame.
+        size  = config.INFERENCE_IMG_SIZE
+        batch = config.INFERENCE_BATCH
+        self.model.predict(
+            [np.zeros((size, size, 3), dtype=np.uint8)] * batch,
+            imgsz=size, device=device, verbose=False,
+        )
+        self._backend = self.model.predictor.model
+
+        # PyTorch-only speed-ups (a TensorRT engine has these baked in):
+        # fold Conv+BN, and on CUDA run FP16 in channels_last (NHWC) layout so
+        # cuDNN can pick its Tensor-Core convolution kernels.
+        memory_format = torch.contiguous_format
+        if self._backend.pt:
+            net = self._backend.model
+            net.fuse(verbose=False)
+            if device == "cuda":
+                memory_format = torch.channels_last
+                self._backend.model = net.to(memory_format=memory_format).half()
+                self._backend.fp16 = True
+
+        # Preprocessing runs on the device: raw uint8 frames are uploaded
+        # as-is (3 bytes/px) and letterboxed / normalised by _letterbox().
+        # On CUDA the batch is uploaded from a pinned buffer with one
+        # non-blocking copy; _infer() reads its results back synchronously,
+        # so the buffer is always idle again before the next batch is staged.
+        # The staging buffers depend on the camera resolution and are
+        # allocated lazily.
+        self._stage: torch.Tensor | None = None   # host (pinned on CUDA), uint8 (B, H, W, 3)
+        self._raw:   torch.Tensor | None = None   # device copy of the above
+
+        dtype = torch.float16 if self._backend.fp16 else torch.float32
+        self._input = torch.empty(
+            (batch, 3, size, size), dtype=dtype, device=device, memory_format=memory_format,
+        )
+
+        # Frame skipping: only every FRAME_SKIP-th frame reaches the model, the
+        # frames in between reuse the most recent result. The counter starts
+        # "one before wrap" so the very first frame is always inferred.
+        self._skip_counter = config.FRAME_SKIP - 1
+        self._last_detections: np.recarray = _empty_detections()
+
+        # Letterbox geometry, recomputed only when the frame size changes:
+        # ((h, w), scale, pad_x, pad_y, resized_w, resized_h)
+        self._geometry: tuple | None = None
+
+        self._warmup()
+
         print(f"[INFO] Model ready. Classes available: {len(self.model.names)}")
 
     # ────────────────────────────────────────────────────────────────────────
-    def detect(self, frame) -> list[Detection]:
+    @staticmethod
+    def _ensure_engine(model_path: Path) -> Path | None:
+        """
+        Return the FP16 TensorRT engine for `model_path`, exporting it on the
+        first run. The engine is specialised to a single fixed input shape
+        (INFERENCE_BATCH × INFERENCE_IMG_SIZE²) so TensorRT can pick the
+        fastest kernels.
+
+        Returns None if the export is not possible (TensorRT missing, etc.).
+        """
+        engine_path = model_path.with_suffix(".engine")
+        if engine_path.exists():
+            return engine_path
+
+        print("[INFO] Exporting TensorRT FP16 engine (one-time, may take a few minutes) …")
+        try:
+            exported = YOLO(str(model_path)).export(
+                format   = "engine",
+                half     = True,
+                imgsz    = config.INFERENCE_IMG_SIZE,
+                device   = 0,
+                batch    = config.INFERENCE_BATCH,
+                dynamic  = False,
+                simplify = True,
+            )
+        except Exception as e:
+            print(f"[WARN] TensorRT export failed ({e}) — using PyTorch weights.")
+            return None
+
+        # Ultralytics writes the engine next to the .pt, i.e. into models/
+        exported = Path(exported)
+        if exported != engine_path:
+            exported.replace(engine_path)
+        print(f"[INFO] TensorRT engine saved to {engine_path}")
+        return engine_path
+
+    # ────────────────────────────────────────────────────────────────────────
+    def detect(self, frame) -> np.recarray:
         """
         Run person detection on a single BGR frame (as returned by cv2.VideoCapture).
 
@@ -80,39 +240,128 @@ class PersonDetector:
 
         Returns
         -------
-        list[Detection]
-            One entry per detected person; empty list if none found.
+        np.recarray
+            One DETECTION_DTYPE record per detected person; empty if none found.
         """
-        # Run YOLOv8 inference.
-        # verbose=False suppresses per-frame console spam.
-        results = self.model.predict(
-            source    = frame,
-            imgsz     = config.INFERENCE_IMG_SIZE,
-            conf      = config.CONFIDENCE_THRESH,
-            iou       = config.IOU_THRESH,
-            classes   = [config.PERSON_CLASS_ID],   # Only detect "person"
-            device    = self.device,
-            verbose   = False,
-        )
+        return self.detect_batch([frame])[0]
 
-        detections: list[Detection] = []
+    def detect_batch(self, frames: list) -> list[np.recarray]:
+        """
+        Run person detection on up to INFERENCE_BATCH frames in one forward pass.
 
-        # results is a list with one element per image (we only pass one frame).
-        r = results[0]
+        Honours config.FRAME_SKIP: frames that fall between two detection
+        frames are not sent to the model and get the last result instead.
 
-        if r.boxes is None:
-            return detections
+        Parameters
+        ----------
+        frames : list[np.ndarray]
+            OpenCV BGR images (H x W x 3), all captured at the same resolution.
 
-        for box in r.boxes:
-            # box.xyxy[0] → tensor([x1, y1, x2, y2]) in pixel coordinates
-            x1, y1, x2, y2 = box.xyxy[0].tolist()
-            conf = float(box.conf[0])
-            detections.append(
-                Detection(
-                    x1=int(x1), y1=int(y1),
-                    x2=int(x2), y2=int(y2),
-                    confidence=conf,
-                )
-            )
+        Returns
+        -------
+        list[np.recarray]
+            One detection array per input frame, in the same order.
+        """
+        run: list[bool] = []
+        for _ in frames:
+            self._skip_counter = (self._skip_counter + 1) % config.FRAME_SKIP
+            run.append(self._skip_counter == 0)
+
+        to_infer = [f for f, r in zip(frames, run) if r]
+        inferred = iter(self._infer(to_infer) if to_infer else [])
+
+        batch_detections: list[np.recarray] = []
+        for r in run:
+            if r:
+                self._last_detections = next(inferred)
+            batch_detections.append(self._last_detections)
+
+        return batch_detections
+
+    # ────────────────────────────────────────────────────────────────────────
+    @torch.inference_mode()
+    def _infer(self, frames: list) -> list[np.recarray]:
+        """Forward `frames` through the model and return one detection array each."""
+        n = len(frames)
+        x = self._preprocess(frames)
+
+        # A static-shape TensorRT engine always takes the full batch; the
+        # unused tail slots are simply ignored after NMS.
+        preds = self._backend(x if self._backend.engine else x[:n])
+
+        # One tensor [N, 6] = (x1, y1, x2, y2, conf, cls) per image, letterbox pixels
+        results = non_max_suppression(
+            preds,
+            conf_thres = config.CONFIDENCE_THRESH,
+            iou_thres  = config.IOU_THRESH,
+            classes    = [config.PERSON_CLASS_ID],   # Only detect "person"
+        )[:n]
+
+        # Map every box of the batch back to frame pixels on the device, then
+        # bring (x1, y1, x2, y2, conf) to the host in a single transfer instead
+        # of one tiny GPU→CPU sync per box.
+        det  = torch.cat(results)
+        rows = torch.cat((self._unletterbox(det[:, :4]), det[:, 4:5]), dim=1).float().cpu().numpy()
+        counts = [len(r) for r in results]
+
+        dets = np.recarray((len(rows),), dtype=DETECTION_DTYPE)
+        dets.x1, dets.y1, dets.x2, dets.y2 = rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+        dets.confidence = rows[:, 4]
+
+        return np.split(dets, np.cumsum(counts)[:-1])
+
+    # ────────────────────────────────────────────────────────────────────────
+    def _warmup(self, runs: int = 3) -> None:
+        """
+        Push a few dummy batches through the full pipeline so CUDA context
+        setup, cuDNN autotuning and lazy weight uploads happen now rather
+        than stalling the first real frames.
+        """
+        dummy = np.zeros((config.FRAME_HEIGHT, config.FRAME_WIDTH, 3), dtype=np.uint8)
+        for _ in range(runs):
+            self._infer([dummy] * config.INFERENCE_BATCH)
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+
+    # ────────────────────────────────────────────────────────────────────────
+    def _preprocess(self, frames: list) -> torch.Tensor:
+        """Upload `frames` and letterbox them into the preallocated input tensor."""
+        n = len(frames)
+        h, w = frames[0].shape[:2]
+        if self._geometry is None or self._geometry[0] != (h, w):
+            size  = config.INFERENCE_IMG_SIZE
+            scale = min(size / h, size / w)
+            nw, nh = int(round(w * scale)), int(round(h * scale))
+            px, py = (size - nw) // 2, (size - nh) // 2
+            self._geometry = ((h, w), scale, px, py, nw, nh)
+            self._alloc_staging(h, w)
+        _, _, px, py, nw, nh = self._geometry
+
+        stage, raw = self._stage, self._raw
+        stage_np = stage.numpy()
+        for i, frame in enumerate(frames):
+            np.copyto(stage_np[i], frame)
+
+        # One upload for the whole batch (on CPU `raw` *is* the staging buffer)
+        if raw is not stage:
+            raw[:n].copy_(stage[:n], non_blocking=True)
+
+        self._input[:n].copy_(_letterbox(raw[:n], config.INFERENCE_IMG_SIZE, nh, nw, py, px))
+        return self._input
+
+    def _alloc_staging(self, h: int, w: int) -> None:
+        """(Re)allocate the uint8 upload buffers for an H×W camera resolution."""
+        shape = (config.INFERENCE_BATCH, h, w, 3)
+        if self.device == "cuda":
+            self._stage = torch.empty(shape, dtype=torch.uint8, pin_memory=True)
+            self._raw   = torch.empty(shape, dtype=torch.uint8, device=self.device)
+        else:
+            self._stage = torch.empty(shape, dtype=torch.uint8)
+            self._raw   = self._stage
 
-        return detections
+    def _unletterbox(self, boxes: torch.Tensor) -> torch.Tensor:
+        """Map [N, 4] xyxy boxes from letterbox coordinates back onto the frame (in place)."""
+        (h, w), scale, px, py, _, _ = self._geometry
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - px) / scale).clamp_(0, w)
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - py) / scale).clamp_(0, h)
+        return boxes
@@ -5,7 +5,9 @@ Kept separate so main.py stays clean and each concern has one home.
 """
 
 import cv2
+import numpy as np
 import time
+from collections import deque
 import sys
 import os
 
@@ -21,56 +23,139 @@ class FPSCounter:
     """Smooth FPS estimator using a sliding window of frame timestamps."""
 
     def __init__(self, window: int = 30):
-        self._window   = window          # Number of frames to average over
-        self._times: list[float] = []    # Ring buffer of recent frame timestamps
+        # Ring buffer of the most recent `window` frame timestamps
+        self._times: deque[float] = deque(maxlen=window)
 
     def tick(self) -> float:
         """Call once per displayed frame. Returns current smoothed FPS."""
         now = time.monotonic()
-        self._times.append(now)
-        # Keep only the most recent `window` timestamps
-        if len(self._times) > self._window:
-            self._times.pop(0)
+        self._times.append(now)   # maxlen evicts the oldest timestamp
         if len(self._times) < 2:
             return 0.0
         elapsed = self._times[-1] - self._times[0]
         return (len(self._times) - 1) / elapsed if elapsed > 0 else 0.0
 
 
+# ────────────────────────────────────────────────────────────────────────────
+# Pre-rendered overlays
+# ────────────────────────────────────────────────────────────────────────────
+# The banner and status chip never change, so their glyphs are rasterised once
+# and only composited onto each frame. Glyphs are kept as the coordinates of
+# the covered pixels plus their (anti-aliased) coverage.
+
+_BANNER_H = 40
+_BANNER_CACHE: dict[int, tuple] = {}   # width  → (fill, glyphs)
+
+_STATUS_H = 30
+_STATUS_CACHE: dict[bool, tuple] = {}  # active → (color, glyphs)
+
+_WHITE = np.array((255, 255, 255), np.float32)
+
+# "Person NN%" labels only take 101 values, so their text and metrics are
+# computed once: percent → (label, (text_w, text_h), baseline)
+_LABEL_CACHE = {
+    pct: (f"Person {pct}%", *cv2.getTextSize(
+        f"Person {pct}%", cv2.FONT_HERSHEY_SIMPLEX, config.FONT_SCALE, 2
+    ))
+    for pct in range(101)
+}
+
+
+def _glyphs(mask: np.ndarray) -> tuple:
+    """
+    (rows, cols, coverage, mask shape) of the non-zero pixels of a 0–255
+    glyph mask.
+    """
+    ys, xs = np.nonzero(mask)
+    return ys, xs, (mask[ys, xs].astype(np.float32) / 255.0)[:, None], mask.shape[:2]
+
+
+def _stamp(roi: np.ndarray, glyphs: tuple, color: np.ndarray) -> None:
+    """
+    Blend `color` into `roi` using cached glyph coverage. In-place. Glyphs
+    falling outside a smaller `roi` are clipped, as cv2.putText would.
+    """
+    ys, xs, alpha, (mh, mw) = glyphs
+    h, w = roi.shape[:2]
+    if mh > h or mw > w:
+        keep = (ys < h) & (xs < w)
+        ys, xs, alpha = ys[keep], xs[keep], alpha[keep]
+    px = roi[ys, xs].astype(np.float32)
+    roi[ys, xs] = px + (color - px) * alpha + 0.5
+
+
+def _banner(width: int) -> tuple:
+    cached = _BANNER_CACHE.get(width)
+    if cached is None:
+        fill = np.empty((_BANNER_H, width, 3), np.uint8)
+        fill[:] = config.ALERT_COLOR
+        text = np.zeros((_BANNER_H, width), np.uint8)
+        cv2.putText(
+            text,
+            "!! PERSON DETECTED !!",
+            (10, 28),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.85,
+            255,
+            2,
+        )
+        cached = _BANNER_CACHE[width] = (fill, _glyphs(text))
+    return cached
+
+
+def _status_chip(active: bool) -> tuple:
+    cached = _STATUS_CACHE.get(active)
+    if cached is None:
+        color = (0, 0, 255) if active else (0, 200, 0)
+        label = "ALERT" if active else "MONITORING"
+        (tw, _), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.55, 2)
+        # Mask rows are aligned with the bottom _STATUS_H rows of the frame
+        mask = np.zeros((_STATUS_H, 32 + tw + 4), np.uint8)
+        cv2.circle(mask, (18, _STATUS_H - 18), 8, 255, -1)
+        cv2.putText(
+            mask, label,
+            (32, _STATUS_H - 12),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.55,
+            255,
+            2,
+        )
+        cached = _STATUS_CACHE[active] = (np.array(color, np.float32), _glyphs(mask))
+    return cached
+
+
 # ────────────────────────────────────────────────────────────────────────────
 # Drawing functions
 # ────────────────────────────────────────────────────────────────────────────
 
-def draw_detections(frame, detections: list) -> None:
+def draw_detections(frame, detections) -> None:
     """
-    Draw a bounding box + confidence label for every Detection in the list.
-    Modifies `frame` in-place.
+    Draw a bounding box + confidence label for every detection record
+    (see detector.DETECTION_DTYPE). Modifies `frame` in-place.
     """
     for det in detections:
+        x1, y1, x2, y2 = int(det.x1), int(det.y1), int(det.x2), int(det.y2)
         # Bounding rectangle
         cv2.rectangle(
             frame,
-            (det.x1, det.y1),
-            (det.x2, det.y2),
+            (x1, y1),
+            (x2, y2),
             config.BOX_COLOR,
             config.BOX_THICKNESS,
         )
         # Label: "Person 87%"
-        label = f"Person {det.confidence:.0%}"
+        label, (tw, th), baseline = _LABEL_CACHE[round(float(det.confidence) * 100)]
         # Small filled rectangle behind text for readability
-        (tw, th), baseline = cv2.getTextSize(
-            label, cv2.FONT_HERSHEY_SIMPLEX, config.FONT_SCALE, 2
-        )
         cv2.rectangle(
             frame,
-            (det.x1, det.y1 - th - baseline - 4),
-            (det.x1 + tw, det.y1),
+            (x1, y1 - th - baseline - 4),
+            (x1 + tw, y1),
             config.BOX_COLOR,
             -1,  # filled
         )
         cv2.putText(
             frame, label,
-            (det.x1, det.y1 - baseline - 2),
+            (x1, y1 - baseline - 2),
             cv2.FONT_HERSHEY_SIMPLEX,
             config.FONT_SCALE,
             (0, 0, 0),   # black text on coloured background
@@ -83,21 +168,11 @@ def draw_alert_banner(frame) -> None:
     Draw a prominent red "⚠ PERSON DETECTED" banner at the top of the frame.
     Modifies `frame` in-place.
     """
-    h, w = frame.shape[:2]
-    banner_h = 40
-    overlay  = frame.copy()
-    cv2.rectangle(overlay, (0, 0), (w, banner_h), config.ALERT_COLOR, -1)
-    # Blend semi-transparently
-    cv2.addWeighted(overlay, 0.6, frame, 0.4, 0, frame)
-    cv2.putText(
-        frame,
-        "!! PERSON DETECTED !!",
-        (10, 28),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.85,
-        (255, 255, 255),
-        2,
-    )
+    fill, text = _banner(frame.shape[1])
+    roi = frame[:_BANNER_H]
+    # Blend semi-transparently, then stamp the cached text on top
+    cv2.addWeighted(fill[:roi.shape[0]], 0.6, roi, 0.4, 0, roi)
+    _stamp(roi, text, _WHITE)
 
 
 def draw_fps(frame, fps: float) -> None:
@@ -119,15 +194,5 @@ def draw_fps(frame, fps: float) -> None:
 
 def draw_status(frame, active: bool) -> None:
     """Draw a small coloured status dot + text in the bottom-left corner."""
-    h, w = frame.shape[:2]
-    color  = (0, 0, 255) if active else (0, 200, 0)
-    label  = "ALERT" if active else "MONITORING"
-    cv2.circle(frame, (18, h - 18), 8, color, -1)
-    cv2.putText(
-        frame, label,
-        (32, h - 12),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.55,
-        color,
-        2,
-    )
+    color, glyphs = _status_chip(active)
+    _stamp(frame[-_STATUS_H:], glyphs, color)
@@ -14,6 +14,9 @@ Event trigger logic (presence-state model):
 Backend integration:
   • On each new event: POST /events, then POST /events/{id}/snapshot
     (runs in a background thread so it never blocks the camera loop).
+
+Snapshots are JPEG-encoded by jpeg_encoder (NVJPEG → libjpeg-turbo → OpenCV);
+the file write happens off-thread and the encoded bytes are uploaded directly.
 """
 
 import cv2
@@ -21,15 +24,38 @@ import os
 import sys
 import time
 import logging
+import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(__file__))
 import config
+from jpeg_encoder import encode_jpeg
 
 logger = logging.getLogger("event_handler")
 
+# PyAV (FFmpeg bindings) for hardware clip encoding — optional
+try:
+    import av
+except ImportError:
+    av = None
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Snapshot files
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _write_file(path: str, data: bytes, file_logger: logging.Logger) -> None:
+    """Runs on the snapshot I/O thread, so it reports the outcome itself."""
+    try:
+        with open(path, "wb") as f:
+            f.write(data)
+    except OSError as e:
+        file_logger.error(f"Failed to save snapshot {path}: {e}")
+        return
+    file_logger.info(f"Snapshot saved → {path}")
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # File logger (mirrors existing logs/detections.log behaviour)
@@ -64,23 +90,113 @@ def _build_file_logger() -> logging.Logger:
 # ─────────────────────────────────────────────────────────────────────────────
 
 class ClipWriter:
+    """
+    Records a fixed-length clip.
+
+    Encodes H.264 on the GPU (NVENC via PyAV, config.CLIP_ENCODER) when
+    available; otherwise falls back to cv2.VideoWriter with CLIP_CODEC.
+
+    Encoding runs on a dedicated thread fed by a bounded queue, so write()
+    never blocks the camera loop; if the encoder falls behind, new frames
+    are dropped rather than stalling capture.  An encoder error (NVENC
+    failure, full disk, …) abandons the clip but never blocks capture.
+    """
+
+    CLOSE_TIMEOUT_S: float = 5.0
+
     def __init__(self, filepath: str, frame_size: tuple[int, int]):
-        fourcc = cv2.VideoWriter_fourcc(*config.CLIP_CODEC)
-        self._writer     = cv2.VideoWriter(filepath, fourcc, config.CLIP_FPS, frame_size)
         self._max_frames = int(config.CLIP_DURATION_S * config.CLIP_FPS)
         self._written    = 0
         self._filepath   = filepath
 
+        self._container = None
+        self._stream    = None
+        self._writer    = None
+        self._failed    = False
+
+        if av is not None and config.CLIP_ENCODER:
+            try:
+                self._open_av(filepath, frame_size)
+            except Exception as e:
+                logger.info(f"{config.CLIP_ENCODER} unavailable ({e}) — using cv2.VideoWriter.")
+                if self._container is not None:
+                    self._container.close()
+                self._container = self._stream = None
+
+        if self._container is None:
+            fourcc = cv2.VideoWriter_fourcc(*config.CLIP_CODEC)
+            self._writer = cv2.VideoWriter(filepath, fourcc, config.CLIP_FPS, frame_size)
+
+        self._q: queue.Queue = queue.Queue(maxsize=int(config.CLIP_FPS * 2))
+        self._thread = threading.Thread(target=self._run, daemon=True, name="clip-encoder")
+        self._thread.start()
+
+    def _open_av(self, filepath: str, frame_size: tuple[int, int]) -> None:
+        self._container = av.open(filepath, "w", format="mp4")
+        self._stream    = self._container.add_stream(config.CLIP_ENCODER, rate=config.CLIP_FPS)
+        self._stream.width, self._stream.height = frame_size
+        self._stream.pix_fmt = "yuv420p"
+        # Open the encoder now so a missing GPU / driver is caught here,
+        # not on the first frame.
+        self._stream.codec_context.open()
+
     def write(self, frame) -> None:
-        if not self.is_finished():
-            self._writer.write(frame)
+        if self.is_finished():
+            return
+        try:
+            # Copy: the caller draws overlays onto `frame` right after this
+            self._q.put_nowait(frame.copy())
             self._written += 1
+        except queue.Full:
+            pass
 
     def is_finished(self) -> bool:
         return self._written >= self._max_frames
 
+    def _run(self) -> None:
+        """
+        Encoder thread — drains the queue until the None sentinel arrives.
+        After an encoding error it keeps draining (without encoding) so the
+        queue never fills up and close() can always hand over the sentinel.
+        """
+        while True:
+            frame = self._q.get()
+            if frame is None:
+                break
+            if self._failed:
+                continue
+            try:
+                if self._stream is not None:
+                    vf = av.VideoFrame.from_ndarray(frame, format="bgr24")
+                    for packet in self._stream.encode(vf):
+                        self._container.mux(packet)
+                else:
+                    self._writer.write(frame)
+            except Exception as e:
+                logger.error(f"Clip encoding failed ({e}) — abandoning {self._filepath}")
+                self._failed = True
+
     def close(self) -> None:
-        self._writer.release()
+        # Bounded waits: close() runs on the capture loop and must never hang it
+        try:
+            self._q.put(None, timeout=self.CLOSE_TIMEOUT_S)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=self.CLOSE_TIMEOUT_S)
+        if self._thread.is_alive():
+            logger.error(f"Clip encoder did not stop — abandoning {self._filepath}")
+            return
+
+        try:
+            if self._stream is not None:
+                if not self._failed:
+                    for packet in self._stream.encode(None):   # flush delayed frames
+                        self._container.mux(packet)
+                self._container.close()
+            else:
+                self._writer.release()
+        except Exception as e:
+            logger.error(f"Failed to finalise clip {self._filepath}: {e}")
 
     @property
     def filepath(self) -> str:
@@ -118,9 +234,17 @@ class EventHandler:
         # Armed state — updated live via WebSocket callback
         self._armed: bool = True
 
+        # File-name timestamps: the "YYYY-MM-DDTHH-MM-" prefix only changes
+        # once a minute, so strftime runs at most once per minute.
+        self._iso_minute: int = -1
+        self._iso_prefix: str = ""
+
+        # Snapshot files are written here so disk I/O never blocks the camera loop
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-io")
+
     # ── Public API ────────────────────────────────────────────────────────────
 
-    def handle(self, frame, detections: list) -> bool:
+    def handle(self, frame, detections) -> bool:
         now   = time.monotonic()
         n_ppl = len(detections)
 
@@ -167,32 +291,35 @@ class EventHandler:
             self._active_clip.close()
             self._file_logger.info(f"Clip finalised on shutdown → {self._active_clip.filepath}")
             self._active_clip = None
+        self._io_pool.shutdown(wait=True)
         self._file_logger.info("Security camera session ended.")
 
     # ── Private helpers ───────────────────────────────────────────────────────
 
-    def _fire_event(self, frame, detections: list, timestamp: float) -> None:
+    def _fire_event(self, frame, detections, timestamp: float) -> None:
         """Called once per debounce window on first detection."""
-        now_utc  = datetime.now(timezone.utc)
-        iso_ts   = now_utc.strftime("%Y-%m-%dT%H-%M-%SZ")
+        epoch    = time.time()
+        now_utc  = datetime.fromtimestamp(epoch, timezone.utc)
+        iso_ts   = self._iso_timestamp(epoch)
         n_people = len(detections)
-        confs    = ", ".join(f"{d.confidence:.0%}" for d in detections)
-        best_conf = max(d.confidence for d in detections)
+        confs    = ", ".join(f"{c:.0%}" for c in detections.confidence)
+        best_conf = float(detections.confidence.max())
 
         self._file_logger.info(
             f"PERSON DETECTED | count={n_people} | confidences=[{confs}]"
         )
 
         # ── Local snapshot ────────────────────────────────────────────────
-        snap_path: str | None = None
+        jpeg: bytes | None = None
         if config.SAVE_SNAPSHOTS:
-            snap_path = os.path.join(config.SNAPSHOTS_DIR, f"snapshot_{iso_ts}.jpg")
-            cv2.imwrite(snap_path, frame)
-            self._file_logger.info(f"Snapshot saved → {snap_path}")
+            jpeg = encode_jpeg(frame)
+            if jpeg is not None:
+                snap_path = f"{config.SNAPSHOTS_DIR}/snapshot_{iso_ts}.jpg"
+                self._io_pool.submit(_write_file, snap_path, jpeg, self._file_logger)
 
         # ── Local clip ────────────────────────────────────────────────────
         if config.SAVE_CLIPS and self._active_clip is None:
-            clip_path = os.path.join(config.CLIPS_DIR, f"clip_{iso_ts}.mp4")
+            clip_path = f"{config.CLIPS_DIR}/clip_{iso_ts}.mp4"
             h, w = frame.shape[:2]
             self._active_clip = ClipWriter(clip_path, (w, h))
             self._active_clip.write(frame)
@@ -202,13 +329,26 @@ class EventHandler:
         if self._api is not None:
             threading.Thread(
                 target=self._report_to_backend,
-                args=(best_conf, now_utc, snap_path),
+                args=(best_conf, now_utc, jpeg),
                 daemon=True,
                 name="event-report",
             ).start()
 
+    def _iso_timestamp(self, epoch: float) -> str:
+        """UTC 'YYYY-MM-DDTHH-MM-SSZ' (file-name safe) for a Unix timestamp."""
+        minute, sec = divmod(int(epoch), 60)
+        if minute != self._iso_minute:
+            self._iso_minute = minute
+            self._iso_prefix = datetime.fromtimestamp(minute * 60, timezone.utc).strftime(
+                "%Y-%m-%dT%H-%M-"
+            )
+        return f"{self._iso_prefix}{sec:02d}Z"
+
     def _report_to_backend(
-        self, confidence: float, happened_at: datetime, snap_path: str | None
+        self,
+        confidence: float,
+        happened_at: datetime,
+        jpeg: bytes | None,
     ) -> None:
         """Posts the event and optional snapshot to the backend (background thread)."""
         event_id = self._api.post_event(confidence, happened_at)
@@ -218,8 +358,9 @@ class EventHandler:
 
         logger.info(f"Event reported → id={event_id}")
 
-        if snap_path and self._api.snapshot_enabled:
-            ok = self._api.upload_snapshot(event_id, snap_path)
+        if jpeg and self._api.snapshot_enabled:
+            # Upload the encoded bytes directly — no need to read the file back
+            ok = self._api.upload_snapshot(event_id, jpeg)
             if ok:
                 logger.info(f"Snapshot uploaded → event_id={event_id}")
             else:
@@ -0,0 +1,116 @@
+"""
+export_int8.py — One-off INT8 TensorRT export, calibrated on your own camera.
+
+Captures a few hundred frames from the configured webcam, writes them as a
+minimal calibration dataset under models/calib/ and exports
+models/<model>.int8.engine with TensorRT's entropy calibrator.
+
+PersonDetector picks the engine up automatically on the next start
+(preference order: .int8.engine → .engine (FP16) → .pt).
+
+Usage (from the agent/ directory, on the machine with the GPU):
+    python src/export_int8.py [--frames 500] [--interval 0.2]
+"""
+
+import sys
+import os
+import argparse
+import time
+from pathlib import Path
+
+# ── ensure src/ is importable regardless of cwd ──────────────────────────────
+_src_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _src_dir)
+
+import cv2
+from ultralytics import YOLO
+
+import config
+from main import open_camera
+
+
+def capture_calibration_frames(images_dir: Path, n_frames: int, interval: float) -> int:
+    """Save `n_frames` camera frames, `interval` seconds apart, as JPEGs."""
+    images_dir.mkdir(parents=True, exist_ok=True)
+    cap = open_camera()
+    saved = 0
+    try:
+        while saved < n_frames:
+            ret, frame = cap.read()
+            if not ret:
+                time.sleep(0.05)
+                continue
+            cv2.imwrite(str(images_dir / f"calib_{saved:04d}.jpg"), frame)
+            saved += 1
+            if saved % 50 == 0:
+                print(f"[INFO] Captured {saved}/{n_frames} calibration frames")
+            time.sleep(interval)
+    finally:
+        cap.release()
+    return saved
+
+
+def write_calibration_yaml(calib_dir: Path, names: dict) -> Path:
+    """Write the dataset YAML Ultralytics expects for `export(int8=True)`."""
+    lines = [
+        f"path: {calib_dir.as_posix()}",
+        "train: images",
+        "val: images",
+        "names:",
+        *(f"  {i}: {name}" for i, name in names.items()),
+    ]
+    yaml_path = calib_dir / "calib.yaml"
+    yaml_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return yaml_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export an INT8 TensorRT engine")
+    parser.add_argument("--frames", type=int, default=500,
+                        help="Number of calibration frames to capture")
+    parser.add_argument("--interval", type=float, default=0.2,
+                        help="Seconds between captured frames (spread over time)")
+    args = parser.parse_args()
+
+    models_dir = Path(config.MODELS_DIR)
+    model_path = models_dir / config.MODEL_NAME
+    if not model_path.exists():
+        print(f"[ERROR] {model_path} not found — run the agent once to download it.")
+        sys.exit(1)
+
+    calib_dir = models_dir / "calib"
+    n = capture_calibration_frames(calib_dir / "images", args.frames, args.interval)
+    print(f"[INFO] {n} calibration frames saved to {calib_dir / 'images'}")
+
+    model     = YOLO(str(model_path))
+    yaml_path = write_calibration_yaml(calib_dir, model.names)
+
+    # Ultralytics always writes <model>.engine; keep an existing FP16 engine
+    # out of the way so it is not overwritten by the INT8 one.
+    fp16_path = model_path.with_suffix(".engine")
+    int8_path = model_path.with_suffix(".int8.engine")
+    backup    = fp16_path.with_suffix(".engine.bak")
+    if fp16_path.exists():
+        fp16_path.replace(backup)
+
+    print("[INFO] Exporting INT8 TensorRT engine (this can take several minutes) …")
+    try:
+        exported = model.export(
+            format  = "engine",
+            int8    = True,
+            data    = str(yaml_path),
+            imgsz   = config.INFERENCE_IMG_SIZE,
+            batch   = config.INFERENCE_BATCH,
+            dynamic = False,
+            device  = 0,
+        )
+        Path(exported).replace(int8_path)
+    finally:
+        if backup.exists():
+            backup.replace(fp16_path)
+
+    print(f"[INFO] INT8 engine saved to {int8_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+jpeg_encoder.py — Fastest available JPEG encoder for BGR frames.
+
+Tried in order, falling through when a backend is missing or fails:
+  1. NVJPEG on the GPU (torchvision.io.encode_jpeg on a CUDA tensor)
+  2. libjpeg-turbo via PyTurboJPEG (SIMD DCT/Huffman on the CPU)
+  3. cv2.imencode (OpenCV's bundled libjpeg)
+
+Kept in its own module so every place that encodes snapshots (event
+snapshots, Telegram alerts) shares the same fallback chain.
+"""
+
+import cv2
+import os
+import sys
+import logging
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+
+logger = logging.getLogger("jpeg_encoder")
+
+# NVJPEG — optional
+try:
+    import torch
+    from torchvision.io import encode_jpeg as _tv_encode_jpeg
+    _NVJPEG = config.DEVICE == "cuda" and torch.cuda.is_available()
+except ImportError:
+    _NVJPEG = False
+
+# libjpeg-turbo — optional (needs both the wheel and the native library)
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420, TJFLAG_PROGRESSIVE
+    _turbo = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _turbo = None
+
+
+def encode_jpeg(frame, quality: int = config.JPEG_QUALITY, progressive: bool = False) -> bytes | None:
+    """
+    Encode a BGR uint8 frame to JPEG bytes. Returns None if encoding fails.
+
+    `progressive` asks the CPU encoders for a progressive JPEG with optimized
+    Huffman tables (smaller, slightly slower); NVJPEG always writes baseline.
+    """
+    global _NVJPEG
+    if _NVJPEG:
+        try:
+            chw = torch.from_numpy(frame).to("cuda").flip(-1).permute(2, 0, 1).contiguous()
+            return _tv_encode_jpeg(chw, quality=quality).cpu().numpy().tobytes()
+        except RuntimeError as e:
+            # torchvision built without CUDA JPEG support (< 0.19)
+            logger.info(f"NVJPEG unavailable ({e}) — using CPU JPEG encoding.")
+            _NVJPEG = False
+
+    if _turbo is not None:
+        # 4:2:0 subsampling, same as cv2.imencode's default
+        return _turbo.encode(frame, quality=quality, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420,
+                             flags=TJFLAG_PROGRESSIVE if progressive else 0)
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if progressive:
+        params += [cv2.IMWRITE_JPEG_OPTIMIZE, 1, cv2.IMWRITE_JPEG_PROGRESSIVE, 1]
+    ok, buf = cv2.imencode(".jpg", frame, params)
+    return buf.tobytes() if ok else None
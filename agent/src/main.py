@@ -23,6 +23,7 @@ sys.path.insert(0, _src_dir)
 import cv2
 import time
 import logging
+from collections import deque
 
 import config
 from detector      import PersonDetector
@@ -168,10 +169,13 @@ def main() -> None:
     cap = open_camera()
 
     paused      = False
-    frame_count = 0
-    detections  = []
     alert_active = False
     conf_thresh = config.CONFIDENCE_THRESH
+    quit_requested = False
+    frames_since_display = 0
+
+    # Frames waiting for the next batched forward pass
+    pending: deque = deque(maxlen=config.INFERENCE_BATCH)
 
     print("\n[INFO] Security camera running.")
     if args.headless:
@@ -181,20 +185,18 @@ def main() -> None:
     print(f"       Threshold: {conf_thresh:.0%}  |  Cooldown: {config.EVENT_COOLDOWN_SECONDS}s\n")
 
     try:
-        while True:
+        while not quit_requested:
             ret, frame = cap.read()
             if not ret:
                 print("[WARN] Frame read failed — retrying …")
                 time.sleep(0.05)
                 continue
 
-            frame_count += 1
-
             # ── Pause handling ────────────────────────────────────────────────
             if paused:
                 if not args.headless:
                     cv2.imshow(config.WINDOW_TITLE, frame)
-                    key = cv2.waitKey(1) & 0xFF
+                    key = cv2.waitKey(config.PAUSED_WAIT_MS) & 0xFF
                     if key == ord("q"):
                         break
                     if key == ord(" "):
@@ -204,19 +206,32 @@ def main() -> None:
                     time.sleep(0.1)
                 continue
 
-            # ── Detect ───────────────────────────────────────────────────────
-            if frame_count % config.FRAME_SKIP == 0:
-                detections = detector.detect(frame)
+            # ── Collect a micro-batch ─────────────────────────────────────────
+            pending.append(frame)
+            if len(pending) < config.INFERENCE_BATCH:
+                continue
+
+            # ── Detect (one forward pass; FRAME_SKIP handled by the detector) ─
+            batch_detections = detector.detect_batch(list(pending))
+
+            for frame, detections in zip(pending, batch_detections):
+                # ── Event handling → backend I/O on background thread ─────────
+                alert_active = event_handler.handle(frame, detections)
 
-            # ── Event handling → backend I/O on background thread ─────────────
-            alert_active = event_handler.handle(frame, detections)
+                # ── Display ───────────────────────────────────────────────────
+                if args.headless:
+                    continue
+
+                fps = fps_counter.tick()
+                # Only every DISPLAY_EVERY_N-th frame is drawn and shown
+                frames_since_display += 1
+                if frames_since_display < config.DISPLAY_EVERY_N:
+                    continue
+                frames_since_display = 0
 
-            # ── Display ───────────────────────────────────────────────────────
-            if not args.headless:
                 draw_detections(frame, detections)
                 if alert_active:
                     draw_alert_banner(frame)
-                fps = fps_counter.tick()
                 draw_fps(frame, fps)
                 draw_status(frame, alert_active)
                 cv2.imshow(config.WINDOW_TITLE, frame)
@@ -224,6 +239,7 @@ def main() -> None:
                 key = cv2.waitKey(1) & 0xFF
                 if key == ord("q"):
                     print("[INFO] Q pressed — shutting down …")
+                    quit_requested = True
                     break
                 elif key == ord(" "):
                     paused = True
@@ -237,6 +253,8 @@ def main() -> None:
                     config.CONFIDENCE_THRESH = conf_thresh
                     print(f"[INFO] Confidence → {conf_thresh:.0%}")
 
+            pending.clear()
+
     except KeyboardInterrupt:
         print("\n[INFO] Interrupted by user.")
     except Exception:
@@ -1,9 +1,14 @@
 """
 notifier.py — Sends Telegram alerts when a person is detected.
 
-Uses the Telegram Bot HTTP API directly via `requests` (already installed
-as a transitive dependency of Ultralytics).  Each notification is sent in
-a background daemon thread so it never blocks the main detection loop.
+Uses the Telegram Bot HTTP API directly via one shared `httpx` client
+speaking HTTP/2, so concurrent messages are multiplexed over a single
+TLS connection.  Notifications are handed to a small worker pool so they never
+block the main detection loop.
+
+Callers that already hold an encoded JPEG (e.g. an MJPEG source or the
+event snapshot) can pass it as `send_alert(..., jpeg_bytes=...)`; it is then
+sent as-is and the frame is never re-encoded.
 
 Setup (one-time):
   1. Message @BotFather on Telegram → /newbot → copy the BOT_TOKEN.
@@ -13,13 +18,22 @@ Setup (one-time):
   3. Paste both values into your .env file (see .env.example).
 """
 
+import cv2
 import os
-import io
-import threading
+import sys
+import time
+import queue
+import socket
+import atexit
 import logging
-import requests
+import threading
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(__file__))
+from jpeg_encoder import encode_jpeg
+
 # Load .env file if python-dotenv is installed (optional but recommended)
 try:
     from dotenv import load_dotenv
@@ -33,70 +47,193 @@ logger = logging.getLogger("security_cam")
 _BOT_TOKEN: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
 _CHAT_ID:   str = os.getenv("TELEGRAM_CHAT_ID",   "")
 
-# Base URL for every Telegram API call
-_API_BASE = f"https://api.telegram.org/bot{_BOT_TOKEN}"
+_CONFIGURED: bool = bool(_BOT_TOKEN and _CHAT_ID)
+
+# Telegram API endpoints
+_API_HOST         = "api.telegram.org"
+_API_BASE         = f"https://{_API_HOST}/bot{_BOT_TOKEN}"
+_SEND_PHOTO_URL   = f"{_API_BASE}/sendPhoto"
+_SEND_MESSAGE_URL = f"{_API_BASE}/sendMessage"
+
+# Form fields shared by every message; each send only adds its caption/text
+_FORM_BASE = {"chat_id": _CHAT_ID, "parse_mode": "Markdown"}
+
+# One client shared by all worker threads (httpx.Client is thread-safe).
+# With HTTP/2, a session message and an alert in flight at the same time
+# share one TLS connection instead of opening a second one.  The transport
+# only retries failed connects, never a request Telegram may have received,
+# so no alert is sent twice.
+# (Pool limits and http2 must be set on the transport — a Client ignores
+# its own `limits`/`http2` when given an explicit transport.)
+_CLIENT = httpx.Client(
+    timeout=10,
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=2,
+        limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+    ),
+)
+atexit.register(_CLIENT.close)
+
+# Two workers are plenty for a handful of messages and bound the thread count
+# during detection bursts (one thread per alert grew without limit).
+_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tg")
+atexit.register(_EXECUTOR.shutdown, wait=False)
+
+# Phone previews don't need archive quality; quality 70 as a progressive
+# JPEG with optimized Huffman tables gives a much smaller upload than plain 85.
+_JPEG_QUALITY: int = int(os.getenv("TELEGRAM_JPEG_QUALITY", "70"))
 
+# Telegram shows a phone-sized preview, so larger frames are shrunk to this
+# long edge before encoding (JPEG encode time and size scale with pixels).
+_MAX_EDGE = 1280
 
-def _is_configured() -> bool:
-    """Return True if both token and chat ID are set."""
-    return bool(_BOT_TOKEN and _CHAT_ID)
+# Static caption layout; only the timestamp, count and confidences vary
+_CAPTION_TMPL = (
+    "🚨 *PERSON DETECTED*\n"
+    "🕐 `{ts}`\n"
+    "👤 Count: *{n}*\n"
+    "📊 Confidence: `{confs}`"
+).format
+
+# At most this many confidences are listed; the rest are summarised as
+# "+N more" so crowded scenes can't exceed Telegram's 1024-char caption limit.
+_MAX_CAPTION_CONFS = 5
+
+# Detection alerts are coalesced: at most one is sent per interval and only
+# the newest pending one survives ("latest wins").  A person standing in view
+# would otherwise trigger one JPEG encode + upload per call and run into
+# Telegram's ~1 message/s per-chat limit.
+_MIN_ALERT_INTERVAL: float = float(os.getenv("TELEGRAM_MIN_INTERVAL_SEC", "3"))
+_ALERT_Q: queue.Queue = queue.Queue(maxsize=1)
+_ALERT_LOCK = threading.Lock()
+_alert_worker: threading.Thread | None = None
 
 
 # ────────────────────────────────────────────────────────────────────────────
-# Internal senders (run inside daemon threads)
+# Internal senders (run on the worker pool)
 # ────────────────────────────────────────────────────────────────────────────
 
 def _send_photo_bytes(jpeg_bytes: bytes, caption: str) -> None:
-    """POST a JPEG image + caption to the Telegram sendPhoto endpoint."""
-    if not _is_configured():
+    """
+    POST a JPEG image + caption to the Telegram sendPhoto endpoint.
+    httpx streams the multipart body, so `jpeg_bytes` is never copied
+    into a second buffer.
+    """
+    if not _CONFIGURED:
         return
     try:
-        resp = requests.post(
-            f"{_API_BASE}/sendPhoto",
-            data={"chat_id": _CHAT_ID, "caption": caption, "parse_mode": "Markdown"},
-            files={"photo": ("snapshot.jpg", io.BytesIO(jpeg_bytes), "image/jpeg")},
-            timeout=10,
+        resp = _CLIENT.post(
+            _SEND_PHOTO_URL,
+            data={**_FORM_BASE, "caption": caption},
+            files={"photo": ("snapshot.jpg", jpeg_bytes, "image/jpeg")},
         )
-        if not resp.ok:
-            logger.warning(f"[Telegram] sendPhoto failed: {resp.text}")
-    except requests.RequestException as exc:
-        logger.warning(f"[Telegram] sendPhoto error: {exc}")
+        # resp.text decodes the whole body — only do it if it will be logged
+        if not resp.is_success and logger.isEnabledFor(logging.WARNING):
+            logger.warning("[Telegram] sendPhoto failed: %s", resp.text)
+    except httpx.HTTPError as exc:
+        logger.warning("[Telegram] sendPhoto error: %s", exc)
 
 
 def _send_text(message: str) -> None:
     """POST a plain text message to the Telegram sendMessage endpoint."""
-    if not _is_configured():
+    if not _CONFIGURED:
         return
     try:
-        resp = requests.post(
-            f"{_API_BASE}/sendMessage",
-            data={"chat_id": _CHAT_ID, "text": message, "parse_mode": "Markdown"},
-            timeout=10,
+        resp = _CLIENT.post(
+            _SEND_MESSAGE_URL,
+            data={**_FORM_BASE, "text": message},
         )
-        if not resp.ok:
-            logger.warning(f"[Telegram] sendMessage failed: {resp.text}")
-    except requests.RequestException as exc:
-        logger.warning(f"[Telegram] sendMessage error: {exc}")
+        if not resp.is_success and logger.isEnabledFor(logging.WARNING):
+            logger.warning("[Telegram] sendMessage failed: %s", resp.text)
+    except httpx.HTTPError as exc:
+        logger.warning("[Telegram] sendMessage error: %s", exc)
+
+
+def _encode_and_send(frame, caption: str, jpeg_bytes: bytes | None = None) -> None:
+    """
+    Send `jpeg_bytes` if given, otherwise encode `frame` to JPEG and send
+    it, or send `caption` alone.
+    """
+    if jpeg_bytes is not None:
+        _send_photo_bytes(jpeg_bytes, caption)
+        return
+
+    if frame is not None:
+        h, w = frame.shape[:2]
+        scale = _MAX_EDGE / max(h, w)
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)),
+                               interpolation=cv2.INTER_AREA)
+        # Encode the frame to JPEG in-memory (no temp file needed)
+        jpeg_bytes = encode_jpeg(frame, _JPEG_QUALITY, progressive=True)
+        if jpeg_bytes is not None:
+            _send_photo_bytes(jpeg_bytes, caption)
+            return
+
+    # Fallback: text-only if there is no frame or encoding failed
+    _send_text(caption)
+
+
+def _alert_loop() -> None:
+    """Drain the alert slot, sending at most one alert per interval."""
+    last_sent = 0.0
+    while True:
+        frame, jpeg_bytes, caption = _ALERT_Q.get()
+        wait = last_sent + _MIN_ALERT_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+            try:   # a newer alert may have replaced this one meanwhile
+                frame, jpeg_bytes, caption = _ALERT_Q.get_nowait()
+            except queue.Empty:
+                pass
+        last_sent = time.monotonic()
+        try:
+            _encode_and_send(frame, caption, jpeg_bytes)
+        except Exception:
+            # Never let one bad alert kill the worker — later ones would
+            # be queued into a slot nobody drains.
+            logger.exception("[Telegram] Failed to send alert")
+
+
+def _warm_dns() -> None:
+    """
+    Resolve the API host once in the background so the first alert doesn't
+    wait on DNS (the answer is then cached by the OS / local resolver).
+    TCP_NODELAY is already set on every connection by httpcore.
+    """
+    try:
+        socket.getaddrinfo(_API_HOST, 443, type=socket.SOCK_STREAM)
+    except OSError as exc:
+        logger.debug("[Telegram] DNS pre-resolve failed: %s", exc)
+
+
+if _CONFIGURED:
+    _EXECUTOR.submit(_warm_dns)
 
 
 # ────────────────────────────────────────────────────────────────────────────
 # Public API
 # ────────────────────────────────────────────────────────────────────────────
 
-def send_alert(frame, detections: list, timestamp_iso: str) -> None:
+def send_alert(frame, detections: list, timestamp_iso: str, *, jpeg_bytes: bytes | None = None) -> None:
     """
-    Fire a Telegram alert in a background thread.
+    Queue a Telegram alert for the background alert worker.
 
     Sends the snapshot image with a formatted caption.
     If frame is None, falls back to a text-only message.
+    Alerts arriving faster than TELEGRAM_MIN_INTERVAL_SEC replace the
+    pending one, so only the latest is encoded and sent.
 
     Parameters
     ----------
     frame         : np.ndarray | None  — current OpenCV BGR frame
-    detections    : list[Detection]    — person detections for this event
+    detections    : np.recarray        — person detections for this event
     timestamp_iso : str               — human-readable ISO timestamp string
+    jpeg_bytes    : bytes | None       — already-encoded snapshot; sent
+                                         as-is instead of encoding `frame`
     """
-    if not _is_configured():
+    if not _CONFIGURED:
         logger.warning(
             "[Telegram] Not configured — set TELEGRAM_BOT_TOKEN and "
             "TELEGRAM_CHAT_ID in your .env file."
@@ -104,52 +241,38 @@ def send_alert(frame, detections: list, timestamp_iso: str) -> None:
         return
 
     n     = len(detections)
-    confs = ", ".join(f"{d.confidence:.0%}" for d in detections)
-    caption = (
-        f"🚨 *PERSON DETECTED*\n"
-        f"🕐 `{timestamp_iso}`\n"
-        f"👤 Count: *{n}*\n"
-        f"📊 Confidence: `{confs}`"
-    )
+    confs = ", ".join([f"{d.confidence:.0%}" for d in detections[:_MAX_CAPTION_CONFS]])
+    if n > _MAX_CAPTION_CONFS:
+        confs += f", +{n - _MAX_CAPTION_CONFS} more"
+    caption = _CAPTION_TMPL(ts=timestamp_iso, n=n, confs=confs)
 
-    if frame is not None:
-        import cv2
-        # Encode the frame to JPEG in-memory (no temp file needed)
-        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        if ok:
-            jpeg_bytes = buf.tobytes()
-            t = threading.Thread(
-                target=_send_photo_bytes,
-                args=(jpeg_bytes, caption),
-                daemon=True,   # dies automatically when main program exits
-            )
-            t.start()
-            return
+    if jpeg_bytes is not None:
+        item = (None, jpeg_bytes, caption)
+    else:
+        # Copy: the caller keeps drawing on its frame buffer after we return
+        item = (frame.copy() if frame is not None else None, None, caption)
 
-    # Fallback: text-only if frame encoding failed
-    t = threading.Thread(target=_send_text, args=(caption,), daemon=True)
-    t.start()
+    global _alert_worker
+    with _ALERT_LOCK:
+        if _alert_worker is None:
+            _alert_worker = threading.Thread(target=_alert_loop, name="tg-alerts", daemon=True)
+            _alert_worker.start()
+        try:
+            _ALERT_Q.get_nowait()   # drop the stale pending alert
+        except queue.Empty:
+            pass
+        _ALERT_Q.put_nowait(item)
 
 
 def send_session_start() -> None:
     """Notify your phone that the security camera has started."""
-    if not _is_configured():
+    if not _CONFIGURED:
         return
-    t = threading.Thread(
-        target=_send_text,
-        args=("🟢 *Security camera started* — monitoring for persons.",),
-        daemon=True,
-    )
-    t.start()
+    _EXECUTOR.submit(_send_text, "🟢 *Security camera started* — monitoring for persons.")
 
 
 def send_session_end() -> None:
     """Notify your phone that the security camera has stopped."""
-    if not _is_configured():
+    if not _CONFIGURED:
         return
-    t = threading.Thread(
-        target=_send_text,
-        args=("🔴 *Security camera stopped.*",),
-        daemon=True,
-    )
-    t.start()
+    _EXECUTOR.submit(_send_text, "🔴 *Security camera stopped.*")
@@ -1,20 +1,63 @@
-from sqlalchemy import create_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.orm import sessionmaker
 import os
 
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./security_camera.db")
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sync driver prefixes → the async driver used for the same database
+_ASYNC_DRIVERS = {
+    "sqlite://":              "sqlite+aiosqlite://",
+    "postgresql://":          "postgresql+asyncpg://",
+    "postgresql+psycopg2://": "postgresql+asyncpg://",
+    "postgres://":            "postgresql+asyncpg://",
+}
+
+def _async_url(url: str) -> str:
+    """Map a plain sync DATABASE_URL onto its async driver."""
+    for prefix, async_prefix in _ASYNC_DRIVERS.items():
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+_engine_kwargs = {}
+if not DATABASE_URL.startswith("sqlite"):
+    # Server databases: a warm connection pool shared by all requests
+    _engine_kwargs = dict(
+        pool_size     = int(os.environ.get("DB_POOL_SIZE", 10)),
+        max_overflow  = int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+        pool_pre_ping = True,
+    )
+
+engine = create_async_engine(_async_url(DATABASE_URL), **_engine_kwargs)
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+# Indexes that were superseded by a wider one and are dropped at startup
+_RETIRED_INDEXES = (
+    "ix_events_user_happened",   # → ix_events_user_happened_device
+    "ix_events_user_id",         # leading column of ix_events_user_happened_device
+)
+
+def _create_missing_indexes(connection):
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+async def init_db():
+    """
+    Create missing tables, then every index declared on the models that the
+    database is missing. create_all() only builds indexes together with
+    brand-new tables, so existing databases would otherwise never pick up
+    indexes added later.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
+        for name in _RETIRED_INDEXES:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
@@ -3,20 +3,29 @@ load_dotenv()
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
-from database import engine, Base
+from contextlib import asynccontextmanager
+from database import engine, init_db
 from routers import auth, devices, dashboard, events, telegram, ws
 
-from fastapi.staticfiles import StaticFiles
 import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize database
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize database
+    await init_db()
+    last_seen_flusher = asyncio.create_task(ws.last_seen_flush_loop())
+    yield
+    last_seen_flusher.cancel()
+    await ws.flush_last_seen()
+    await telegram.close_client()
+    await engine.dispose()
 
-app = FastAPI(title="Security Camera Mother System API")
+app = FastAPI(title="Security Camera Mother System API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,9 +35,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Create media directory if it doesn't exist
+# Create media directory if it doesn't exist (served by events.serve_media)
 os.makedirs("media/events", exist_ok=True)
-app.mount("/media", StaticFiles(directory="media"), name="media")
 
 # Include Routers
 app.include_router(auth.router)
@@ -39,7 +47,7 @@ app.include_router(telegram.router)
 app.include_router(ws.router)
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"status": "ok", "service": "Security Camera Backend"}
 
 if __name__ == "__main__":
@@ -1,10 +1,37 @@
+import os
+import time
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, DateTime, Enum, Index
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.orm import relationship
 import enum
 from database import Base
 
+def _uuid7() -> uuid.UUID:
+    """UUIDv7: 48-bit Unix-ms timestamp, then 74 random bits (RFC 9562)."""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76   # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62   # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+# Time-ordered ids keep primary-key inserts appending to the end of the index
+uuid7 = getattr(uuid, "uuid7", _uuid7)
+
+class UTCDateTime(TypeDecorator):
+    """
+    Naive-UTC timestamp column. Timezone-aware values are converted to UTC
+    and stripped of tzinfo on the way in, since asyncpg refuses aware
+    datetimes for TIMESTAMP WITHOUT TIME ZONE. Naive values are taken as UTC.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
 class ControlMode(str, enum.Enum):
     BOTH = "BOTH"
     DASHBOARD_ONLY = "DASHBOARD_ONLY"
@@ -16,7 +43,7 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
     devices = relationship("Device", back_populates="owner")
     telegram_link = relationship("TelegramLink", uselist=False, back_populates="user")
@@ -28,7 +55,7 @@ class Device(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     device_token = Column(String, unique=True, index=True, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     name = Column(String, nullable=True)
     platform = Column(String, nullable=True)
     agent_version = Column(String, nullable=True)
@@ -40,8 +67,8 @@ class Device(Base):
     control_mode = Column(String, default=ControlMode.BOTH.value, nullable=False)
     headless = Column(Boolean, default=False, nullable=False)
 
-    last_seen_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    last_seen_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
 
     owner = relationship("User", back_populates="devices")
     events = relationship("Event", back_populates="device")
@@ -52,7 +79,7 @@ class PairCode(Base):
     id = Column(Integer, primary_key=True, index=True)
     pair_code = Column(String, unique=True, index=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(UTCDateTime, nullable=False)
     used = Column(Boolean, default=False, nullable=False)
 
     user = relationship("User", back_populates="pair_codes")
@@ -60,20 +87,31 @@ class PairCode(Base):
 class Event(Base):
     __tablename__ = "events"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=lambda: str(uuid7()))
     device_id = Column(Integer, ForeignKey("devices.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     event_type = Column(String, default="PERSON", nullable=False)
     confidence = Column(Float, nullable=False)
-    happened_at = Column(DateTime, nullable=False) # Agent time
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False) # Server time
+    happened_at = Column(UTCDateTime, nullable=False) # Agent time
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False) # Server time
     
     image_filename = Column(String, nullable=True)
 
     device = relationship("Device", back_populates="events")
     user = relationship("User", back_populates="events")
 
+# Serves the dashboard's "events of user X (on device Y), newest first" listing.
+# On PostgreSQL the other listed columns are INCLUDEd, so a page of events is an
+# index-only scan with no sort step.
+Index(
+    "ix_events_user_happened_device",
+    Event.user_id,
+    Event.happened_at.desc(),
+    Event.device_id,
+    postgresql_include=["id", "confidence", "created_at", "image_filename"],
+)
+
 class TelegramLink(Base):
     __tablename__ = "telegram_links"
 
@@ -91,7 +129,7 @@ class TelegramOTP(Base):
     otp_code = Column(String, unique=True, index=True, nullable=False)
     chat_id = Column(String, nullable=False, default="")
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # set when OTP is for a specific user
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(UTCDateTime, nullable=False)
     used = Column(Boolean, default=False, nullable=False)
 
 class TelegramUpdate(Base):
@@ -99,4 +137,4 @@ class TelegramUpdate(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     update_id = Column(Integer, unique=True, index=True, nullable=False)
-    processed_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    processed_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from schemas import *
@@ -10,17 +12,20 @@ import schemas, models, security, database
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Password hashing is deliberately CPU-heavy, so it runs on the threadpool
+# instead of blocking the event loop.
+
 @router.post("/register", response_model=schemas.Token)
-def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(database.get_db)):
+    db_user = await db.scalar(select(models.User).where(models.User.email == user.email))
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = security.get_password_hash(user.password)
+    hashed_password = await run_in_threadpool(security.get_password_hash, user.password)
     new_user = models.User(email=user.email, password_hash=hashed_password)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     access_token = security.create_access_token(
         data={"sub": new_user.email},
@@ -29,14 +34,21 @@ def register(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=schemas.Token)
-def login(user: schemas.UserLogin, db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if not db_user or not security.verify_password(user.password, db_user.password_hash):
+async def login(user: schemas.UserLogin, db: AsyncSession = Depends(database.get_db)):
+    db_user = await db.scalar(select(models.User).where(models.User.email == user.email))
+    if not db_user or not await run_in_threadpool(
+        security.verify_password, user.password, db_user.password_hash
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Upgrade legacy bcrypt hashes to Argon2id now that we know the password
+    if security.password_needs_rehash(db_user.password_hash):
+        db_user.password_hash = await run_in_threadpool(security.get_password_hash, user.password)
+        await db.commit()
     
     access_token = security.create_access_token(
         data={"sub": db_user.email},
@@ -45,22 +57,22 @@ def login(user: schemas.UserLogin, db: Session = Depends(database.get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/google", response_model=schemas.Token)
-def google_auth(request: schemas.GoogleAuthRequest, db: Session = Depends(database.get_db)):
+async def google_auth(request: schemas.GoogleAuthRequest, db: AsyncSession = Depends(database.get_db)):
     # 1. Verify Google Token
-    idinfo = security.verify_google_token(request.token)
+    idinfo = await run_in_threadpool(security.verify_google_token, request.token)
     email = idinfo['email']
     
     # 2. Find or Create User
-    db_user = db.query(models.User).filter(models.User.email == email).first()
+    db_user = await db.scalar(select(models.User).where(models.User.email == email))
     if not db_user:
         # Create a new user but with a random/null password since they use Google
         import secrets
         random_pw = secrets.token_urlsafe(32)
-        hashed_password = security.get_password_hash(random_pw)
+        hashed_password = await run_in_threadpool(security.get_password_hash, random_pw)
         db_user = models.User(email=email, password_hash=hashed_password)
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
     
     # 3. Issue our own JWT
     access_token = security.create_access_token(
@@ -6,17 +6,34 @@ Pushes WS set_state to the agent when armed state changes.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timedelta, timezone
 
 from schemas import *
 from models import *
 from security import *
 from database import *
 import schemas, models, security, database
+from routers.devices import invalidate_device_token
 
 router = APIRouter(tags=["dashboard"])
 
+# A device counts as online if it was seen this recently (agent heartbeats every 3s)
+ONLINE_WINDOW = timedelta(seconds=10)
+
+
+def _online_cutoff() -> datetime:
+    """Oldest last_seen_at that still counts as online (naive UTC, like the column)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None) - ONLINE_WINDOW
+
+
+def _is_online(device: models.Device) -> bool:
+    return (
+        device.last_seen_at is not None
+        and device.last_seen_at.replace(tzinfo=None) >= _online_cutoff()
+    )
+
 
 async def _push_state(device_id: int, armed: bool) -> None:
     from routers.ws import manager
@@ -31,22 +48,19 @@ async def _push_config(device_id: int, cfg: dict) -> None:
 # ── GET /devices ──────────────────────────────────────────────────────────────
 
 @router.get("/devices", response_model=list[schemas.DeviceResponse])
-def get_devices(
+async def get_devices(
     current_user: models.User = Depends(security.get_current_user),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    devices = db.query(models.Device).filter(models.Device.user_id == current_user.id).all()
-    out = []
-    now = datetime.now(timezone.utc)
-    for d in devices:
-        d_dict = schemas.DeviceResponse.model_validate(d).model_dump()
-        if d.last_seen_at:
-            # Using 10 seconds as the offline threshold (agent heartbeats every 3s)
-            d_dict['online'] = (now - d.last_seen_at.replace(tzinfo=timezone.utc)).total_seconds() < 10
-        else:
-            d_dict['online'] = False
-        out.append(d_dict)
-    return out
+    # The online flag is computed by the database in the same query
+    online = (models.Device.last_seen_at >= _online_cutoff()).label("online")
+    rows = await db.execute(
+        select(models.Device, online).where(models.Device.user_id == current_user.id)
+    )
+    return [
+        schemas.DeviceResponse.model_validate(d).model_copy(update={"online": bool(is_online)})
+        for d, is_online in rows
+    ]
 
 
 # ── PATCH /dashboard/devices/{id} ────────────────────────────────────────────
@@ -56,12 +70,11 @@ async def update_device(
     device_id: int,
     update_data: schemas.DeviceUpdateRequest,
     current_user: models.User = Depends(security.get_current_user),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    device = (
-        db.query(models.Device)
-        .filter(models.Device.id == device_id, models.Device.user_id == current_user.id)
-        .first()
+    device = await db.scalar(
+        select(models.Device)
+        .where(models.Device.id == device_id, models.Device.user_id == current_user.id)
     )
     if not device:
         raise HTTPException(status_code=404, detail="Device not found")
@@ -86,12 +99,7 @@ async def update_device(
 
         # If arming, and it's currently offline, spawn the agent process remotely
         if device.armed:
-            now_utc = datetime.now(timezone.utc)
-            is_online = False
-            if device.last_seen_at:
-                is_online = (now_utc - device.last_seen_at.replace(tzinfo=timezone.utc)).total_seconds() < 10
-            
-            if not is_online:
+            if not _is_online(device):
                 import subprocess, os, sys
                 try:
                     agent_dir = os.path.abspath(os.path.join(os.getcwd(), "..", "agent"))
@@ -133,8 +141,9 @@ async def update_device(
     if update_data.control_mode is not None:
         device.control_mode = update_data.control_mode.value
 
-    db.commit()
-    db.refresh(device)
+    await db.commit()
+    await db.refresh(device)
+    invalidate_device_token(device.device_token)
 
     # Push changes to agent over WebSocket (if connected)
     if push_state:
@@ -148,11 +157,6 @@ async def update_device(
         })
 
     # Return with computed online status
-    now = datetime.now(timezone.utc)
-    d_dict = schemas.DeviceResponse.model_validate(device).model_dump()
-    if device.last_seen_at:
-        d_dict['online'] = (now - device.last_seen_at.replace(tzinfo=timezone.utc)).total_seconds() < 10
-    else:
-        d_dict['online'] = False
-        
-    return d_dict
+    return schemas.DeviceResponse.model_validate(device).model_copy(
+        update={"online": _is_online(device)}
+    )
@@ -1,8 +1,11 @@
 import secrets
 import string
+import time
+from typing import NamedTuple
 from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
 from schemas import *
@@ -21,19 +24,62 @@ def generate_device_token(length=32):
     characters = string.ascii_letters + string.digits
     return "".join(secrets.choice(characters) for _ in range(length))
 
-def get_device_by_token(x_device_token: str = Header(...), db: Session = Depends(database.get_db)):
+class CachedDevice(NamedTuple):
+    """The device columns agent requests need, without a live ORM object."""
+    id: int
+    user_id: int
+    name: str | None
+    armed: bool
+    confidence_threshold: float
+    cooldown_sec: int
+
+
+# Device tokens never change, so agent calls resolve them from this cache
+# instead of hitting the DB every time. Entries expire after TOKEN_CACHE_TTL
+# seconds and are dropped as soon as the device is modified. Only touched
+# from the event loop, so no locking is needed.
+TOKEN_CACHE_TTL = 30.0
+TOKEN_CACHE_MAX = 10_000
+_TOKEN_CACHE: dict[str, tuple[float, CachedDevice]] = {}
+
+_DEVICE_BY_TOKEN = select(
+    models.Device.id,
+    models.Device.user_id,
+    models.Device.name,
+    models.Device.armed,
+    models.Device.confidence_threshold,
+    models.Device.cooldown_sec,
+).where(models.Device.device_token == bindparam("token"))
+
+
+def invalidate_device_token(device_token: str) -> None:
+    _TOKEN_CACHE.pop(device_token, None)
+
+
+async def get_device_by_token(x_device_token: str = Header(...), db: AsyncSession = Depends(database.get_db)):
     if not x_device_token:
         raise HTTPException(status_code=401, detail="Missing X-Device-Token")
-    device = db.query(models.Device).filter(models.Device.device_token == x_device_token).first()
-    if not device:
+
+    now = time.monotonic()
+    hit = _TOKEN_CACHE.get(x_device_token)
+    if hit and hit[0] > now:
+        return hit[1]
+
+    row = (await db.execute(_DEVICE_BY_TOKEN, {"token": x_device_token})).first()
+    if not row:
         raise HTTPException(status_code=401, detail="Invalid X-Device-Token")
+
+    device = CachedDevice(*row)
+    if len(_TOKEN_CACHE) >= TOKEN_CACHE_MAX:
+        _TOKEN_CACHE.clear()
+    _TOKEN_CACHE[x_device_token] = (now + TOKEN_CACHE_TTL, device)
     return device
 
 
 @router.post("/pair-codes", response_model=schemas.PairCodeResponse)
-def create_pair_code(current_user: models.User = Depends(security.get_current_user), db: Session = Depends(database.get_db)):
+async def create_pair_code(current_user: models.User = Depends(security.get_current_user), db: AsyncSession = Depends(database.get_db)):
     # Invalidate older unused pair codes for this user (optional clean up)
-    db.query(models.PairCode).filter(models.PairCode.user_id == current_user.id, models.PairCode.used == False).delete()
+    await db.execute(delete(models.PairCode).where(models.PairCode.user_id == current_user.id, models.PairCode.used == False))
     
     expires_delta = timedelta(minutes=10)
     expires_at = datetime.now(timezone.utc) + expires_delta
@@ -46,20 +92,20 @@ def create_pair_code(current_user: models.User = Depends(security.get_current_us
     )
     db.add(db_pair_code)
     try:
-        db.commit()
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Error generating pair code. Please try again.")
     
     return {"pair_code": code, "expires_at": expires_at}
 
 @router.post("/devices/pair", response_model=schemas.DevicePairResponse)
-def pair_device(pair_request: schemas.DevicePairRequest, db: Session = Depends(database.get_db)):
+async def pair_device(pair_request: schemas.DevicePairRequest, db: AsyncSession = Depends(database.get_db)):
     # find pair code
-    pair_code_entry = db.query(models.PairCode).filter(
+    pair_code_entry = await db.scalar(select(models.PairCode).where(
         models.PairCode.pair_code == pair_request.pair_code,
         models.PairCode.used == False
-    ).with_for_update().first() # atomically lock row
+    ).with_for_update()) # atomically lock row
 
     if not pair_code_entry:
         raise HTTPException(status_code=400, detail="PAIR_CODE_INVALID")
@@ -80,7 +126,7 @@ def pair_device(pair_request: schemas.DevicePairRequest, db: Session = Depends(d
         agent_version=pair_request.agent_version
     )
     db.add(device)
-    db.commit()
-    db.refresh(device)
+    await db.commit()
+    await db.refresh(device)
     
     return {"device_token": new_token, "device_id": device.id}
@@ -5,17 +5,23 @@ After creating an event / uploading snapshot, fires a Telegram alert
 to the device owner (if linked).
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
+import anyio
+from fastapi.responses import FileResponse, Response
+from starlette.formparsers import MultiPartParser
+from pydantic import TypeAdapter
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
-import os, uuid, shutil
+from email.utils import parsedate_to_datetime
+import os, re, sys
 
 from schemas import *
 from models import *
 from security import *
 from database import *
-from routers.devices import get_device_by_token
+from routers.devices import CachedDevice, get_device_by_token
 import schemas, models, security, database
 
 router = APIRouter(tags=["events"])
@@ -23,6 +29,66 @@ router = APIRouter(tags=["events"])
 MEDIA_DIR = os.environ.get("MEDIA_DIR", "./media")
 os.makedirs(MEDIA_DIR, exist_ok=True)
 
+_EVENT_BY_ID = select(models.Event).where(models.Event.id == bindparam("event_id"))
+
+_UPLOAD_CHUNK = 64 * 1024
+
+# os.sendfile() only accepts a regular file as destination on Linux (macOS
+# and the BSDs require a socket), so the kernel-side copy is Linux-only.
+_SENDFILE_TO_FILE = sys.platform.startswith("linux")
+
+# Validates and serialises a whole event listing in one pydantic-core call
+_EVENTS_TA = TypeAdapter(list[schemas.EventResponse])
+
+# Snapshots live in a two-level fan-out (≤256² directories) so no single
+# directory grows without bound. UUIDv7 ids start with a timestamp, so the
+# shard is taken from the random tail: "<id[-2:]>/<id[-4:-2]>/<id>.jpg".
+# Pre-sharding snapshots are stored flat as "<id>.jpg" and still served.
+_SNAPSHOT_PATH = re.compile(r"(?:[0-9a-f]{2}/[0-9a-f]{2}/)?[0-9a-f-]{36}\.jpg")
+
+
+# Shard directories this process has already created — skips the mkdir/stat
+# syscalls of os.makedirs on every upload. Per process; makedirs(exist_ok=True)
+# still covers other workers creating the same directory.
+_known_dirs: set[str] = set()
+
+
+# Snapshot files never change once written (the name is the event id), so
+# browsers may keep them for a year and only revalidate on a hard reload.
+_MEDIA_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+def _snapshot_relpath(event_id: str) -> str:
+    return f"{event_id[-2:]}/{event_id[-4:-2]}/{event_id}.jpg"
+
+
+class _ZeroCopyFileResponse(FileResponse):
+    """
+    FileResponse that hands the open file to the server when it supports the
+    ASGI `http.response.zerocopysend` extension, so the bytes go out through
+    sendfile() instead of read()/write() loops in Python. HEAD and Range
+    requests, and servers without the extension, use the normal path.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if (
+            "http.response.zerocopysend" not in scope.get("extensions", {})
+            or scope["method"] == "HEAD"
+            or any(name == b"range" for name, _ in scope["headers"])
+        ):
+            return await super().__call__(scope, receive, send)
+
+        if self.stat_result is None:
+            self.stat_result = os.stat(self.path)
+            self.set_stat_headers(self.stat_result)
+
+        with open(self.path, "rb") as f:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.zerocopysend", "file": f, "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # POST /events
@@ -32,10 +98,10 @@ os.makedirs(MEDIA_DIR, exist_ok=True)
 async def create_event(
     event_data: schemas.EventCreateRequest,
     background_tasks: BackgroundTasks,
-    device: models.Device = Depends(get_device_by_token),
-    db: Session = Depends(database.get_db),
+    device: CachedDevice = Depends(get_device_by_token),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    event_id = str(uuid.uuid4())
+    event_id = str(models.uuid7())
 
     new_event = models.Event(
         id         = event_id,
@@ -47,7 +113,7 @@ async def create_event(
     )
 
     db.add(new_event)
-    db.commit()
+    await db.commit()
 
     # Fire Telegram alert in background (no snapshot yet)
     background_tasks.add_task(
@@ -57,7 +123,6 @@ async def create_event(
         confidence = event_data.confidence,
         happened_at= event_data.happened_at,
         snap_url   = None,
-        db_url     = str(db.get_bind().url),
     )
 
     return {"id": event_id}
@@ -68,51 +133,146 @@ async def create_event(
 # ─────────────────────────────────────────────────────────────────────────────
 
 @router.post("/events/{event_id}/snapshot", response_model=schemas.SnapshotUploadResponse)
-def upload_snapshot(
+async def upload_snapshot(
     event_id: str,
     file: UploadFile = File(...),
-    device: models.Device = Depends(get_device_by_token),
-    db: Session = Depends(database.get_db),
+    device: CachedDevice = Depends(get_device_by_token),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    event = db.query(models.Event).filter(models.Event.id == event_id).first()
+    event = await db.scalar(_EVENT_BY_ID, {"event_id": event_id})
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     if event.device_id != device.id:
         raise HTTPException(status_code=403, detail="Forbidden: event does not belong to this device")
 
-    # Secure, deterministic storage path
-    target_dir = os.path.join(MEDIA_DIR, "events")
-    os.makedirs(target_dir, exist_ok=True)
-
-    filename  = f"{event_id}.jpg"   # UUID filename — no traversal possible
-    file_path = os.path.join(target_dir, filename)
+    # Secure, deterministic storage path (event_id is a UUID that exists in
+    # the DB — no traversal possible)
+    filename  = _snapshot_relpath(event_id)
+    file_path = os.path.join(MEDIA_DIR, "events", filename)
+    target_dir = os.path.dirname(file_path)
+    if target_dir not in _known_dirs:
+        os.makedirs(target_dir, exist_ok=True)
+        _known_dirs.add(target_dir)
 
-    with open(file_path, "wb") as buf:
-        shutil.copyfileobj(file.file, buf)
+    await _store_upload(file, file_path)
 
     event.image_filename = filename
-    db.commit()
+    await db.commit()
 
     return {"success": True, "image_url": f"/media/events/{filename}"}
 
 
+async def _store_upload(upload: UploadFile, file_path: str) -> None:
+    """
+    Write an uploaded file to disk without blocking the event loop. Uploads
+    that Starlette already spooled to a temp file are copied kernel-side with
+    os.sendfile() on Linux; small in-memory ones (and anything sendfile
+    refuses) are written in chunks via anyio.
+    """
+    # Starlette spools parts larger than spool_max_size to disk
+    spooled = upload.size is not None and upload.size > MultiPartParser.spool_max_size
+    if spooled and _SENDFILE_TO_FILE:
+        try:
+            await run_in_threadpool(_sendfile_copy, upload.file, file_path)
+            return
+        except OSError:
+            pass   # e.g. filesystem without sendfile support — copy in Python
+
+    await upload.seek(0)
+    async with await anyio.open_file(file_path, "wb") as dst:
+        while chunk := await upload.read(_UPLOAD_CHUNK):
+            await dst.write(chunk)
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """
+    Conditional GET check. If-None-Match takes precedence over
+    If-Modified-Since, as in RFC 9110 §13.2.2.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _sendfile_copy(src, file_path: str) -> None:
+    src.flush()
+    src_fd = src.fileno()
+    dst_fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        offset = 0
+        while sent := os.sendfile(dst_fd, src_fd, offset, 1 << 20):
+            offset += sent
+    finally:
+        os.close(dst_fd)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# GET /media/events/{filename}
+# ─────────────────────────────────────────────────────────────────────────────
+
+@router.get("/media/events/{filename:path}")
+async def serve_media(filename: str, request: Request):
+    if not _SNAPSHOT_PATH.fullmatch(filename):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    file_path = os.path.join(MEDIA_DIR, "events", filename)
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    response = _ZeroCopyFileResponse(
+        file_path,
+        media_type="image/jpeg",
+        stat_result=st,
+        headers={"Cache-Control": _MEDIA_CACHE_CONTROL},
+    )
+    if _not_modified(request, response.headers["etag"], st.st_mtime):
+        return Response(status_code=304, headers={
+            "ETag":          response.headers["etag"],
+            "Last-Modified": response.headers["last-modified"],
+            "Cache-Control": _MEDIA_CACHE_CONTROL,
+        })
+    return response
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # GET /events
 # ─────────────────────────────────────────────────────────────────────────────
 
 @router.get("/events", response_model=list[schemas.EventResponse])
-def get_events(
+async def get_events(
     device_id: int | None = None,
     limit:  int = 50,
     skip:   int = 0,
     current_user: models.User = Depends(security.get_current_user),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    q = db.query(models.Event).filter(models.Event.user_id == current_user.id)
+    # Read-only listing: fetch plain rows (no ORM hydration) and turn them
+    # into JSON in a single TypeAdapter pass instead of per-row models that
+    # FastAPI would then re-validate against response_model.
+    q = select(
+        models.Event.id,
+        models.Event.device_id,
+        models.Event.confidence,
+        models.Event.happened_at,
+        models.Event.created_at,
+        models.Event.image_filename,
+    ).where(models.Event.user_id == current_user.id)
     if device_id:
-        q = q.filter(models.Event.device_id == device_id)
-    events = q.order_by(models.Event.happened_at.desc()).offset(skip).limit(limit).all()
-    return events
+        q = q.where(models.Event.device_id == device_id)
+    rows = await db.execute(q.order_by(models.Event.happened_at.desc()).offset(skip).limit(limit))
+    events = _EVENTS_TA.validate_python(rows.all(), from_attributes=True)
+    return Response(content=_EVENTS_TA.dump_json(events), media_type="application/json")
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -120,11 +280,11 @@ def get_events(
 # ─────────────────────────────────────────────────────────────────────────────
 
 @router.delete("/events")
-def delete_all_events(
+async def delete_all_events(
     current_user: models.User = Depends(security.get_current_user),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    events = db.query(models.Event).filter(models.Event.user_id == current_user.id).all()
+    events = await db.scalars(select(models.Event).where(models.Event.user_id == current_user.id))
     
     deleted_count = 0
     for ev in events:
@@ -136,10 +296,10 @@ def delete_all_events(
             except Exception as e:
                 print(f"Failed to delete {file_path}: {e}")
         
-        db.delete(ev)
+        await db.delete(ev)
         deleted_count += 1
         
-    db.commit()
+    await db.commit()
     return {"success": True, "deleted": deleted_count}
 
 
@@ -147,31 +307,27 @@ def delete_all_events(
 # Background task — send Telegram alert (runs after response is sent)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _tg_event_alert(
+async def _tg_event_alert(
     user_id: int,
     device_name: str,
     confidence: float,
     happened_at: datetime,
     snap_url: str | None,
-    db_url: str,
 ) -> None:
     """
-    Called as a FastAPI BackgroundTask.  Opens its own short-lived DB session
-    so it doesn't conflict with the request session that's already been closed.
+    Called as a FastAPI BackgroundTask on the event loop.  Opens its own
+    short-lived DB session so it doesn't conflict with the request session
+    that's already been closed.
     """
-    import asyncio
     from database import SessionLocal
     from routers.telegram import send_event_alert
 
-    db2 = SessionLocal()
-    try:
-        asyncio.run(send_event_alert(
+    async with SessionLocal() as db2:
+        await send_event_alert(
             user_id     = user_id,
             device_name = device_name,
             confidence  = confidence,
             happened_at = happened_at,
             snapshot_url= snap_url,
             db          = db2,
-        ))
-    finally:
-        db2.close()
+        )
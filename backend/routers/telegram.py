@@ -18,11 +18,12 @@ Alert sending:
 
 import os
 import secrets
-import asyncio
 from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi import Request
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 import httpx
 import logging
 
@@ -31,6 +32,7 @@ from models import *
 from security import *
 from database import *
 import schemas, models, security, database
+from routers.devices import invalidate_device_token
 
 router = APIRouter(prefix="/telegram", tags=["telegram"])
 logger = logging.getLogger(__name__)
@@ -38,6 +40,34 @@ logger = logging.getLogger(__name__)
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
 _TG_API = "https://api.telegram.org/bot"
 
+# One pooled HTTP/2 client for every Bot API call, so sends reuse a kept-alive
+# TLS connection instead of handshaking each time. Closed on app shutdown.
+_client: httpx.AsyncClient | None = None
+
+# Hot lookups, built once at import and executed with bound parameters
+_LINK_BY_USER = select(models.TelegramLink).where(
+    models.TelegramLink.user_id == bindparam("user_id"),
+    models.TelegramLink.enabled == True,
+)
+_LINK_BY_CHAT = select(models.TelegramLink).where(
+    models.TelegramLink.chat_id == bindparam("chat_id"),
+    models.TelegramLink.enabled == True,
+)
+_UNUSED_OTP = select(models.TelegramOTP).where(
+    models.TelegramOTP.otp_code == bindparam("otp_code"),
+    models.TelegramOTP.used == False,
+)
+# Idempotency: claim an update_id with one INSERT ... ON CONFLICT DO NOTHING
+# RETURNING — a row comes back only for the first delivery of an update.
+_insert = postgresql.insert if database.engine.dialect.name == "postgresql" else sqlite.insert
+_CLAIM_UPDATE = (
+    _insert(models.TelegramUpdate)
+    .values(update_id=bindparam("update_id"))
+    .on_conflict_do_nothing(index_elements=["update_id"])
+    .returning(models.TelegramUpdate.update_id)
+)
+_DEVICES_BY_USER = select(models.Device).where(models.Device.user_id == bindparam("user_id"))
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers
 # ─────────────────────────────────────────────────────────────────────────────
@@ -47,6 +77,24 @@ def _otp() -> str:
     return str(secrets.randbelow(900000) + 100000)
 
 
+def _tg_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
 async def _send(chat_id: str, text: str, parse_mode: str = "HTML") -> None:
     """Fire-and-forget Telegram sendMessage."""
     if not TELEGRAM_BOT_TOKEN:
@@ -54,20 +102,19 @@ async def _send(chat_id: str, text: str, parse_mode: str = "HTML") -> None:
         return
     url = f"{_TG_API}{TELEGRAM_BOT_TOKEN}/sendMessage"
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            await client.post(url, json={
-                "chat_id": chat_id,
-                "text": text,
-                "parse_mode": parse_mode,
-            })
+        await _tg_client().post(url, json={
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": parse_mode,
+        })
     except Exception as e:
         logger.warning(f"Telegram sendMessage failed: {e}")
 
 
-async def _push_arm_state(device: models.Device, armed: bool) -> None:
+async def _push_arm_state(device_id: int, armed: bool) -> None:
     """Push set_state to the agent over WebSocket (if connected)."""
     from routers.ws import manager   # import here to avoid circular at module load
-    await manager.push(device.id, {"type": "set_state", "armed": armed})
+    await manager.push(device_id, {"type": "set_state", "armed": armed})
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -80,17 +127,10 @@ async def send_event_alert(
     confidence: float,
     happened_at: datetime,
     snapshot_url: str | None,
-    db: Session,
+    db: AsyncSession,
 ) -> None:
     """Send a Telegram alert to the user linked to user_id (if any)."""
-    link = (
-        db.query(models.TelegramLink)
-        .filter(
-            models.TelegramLink.user_id == user_id,
-            models.TelegramLink.enabled == True,
-        )
-        .first()
-    )
+    link = await db.scalar(_LINK_BY_USER, {"user_id": user_id})
     if not link:
         return
 
@@ -113,9 +153,9 @@ async def send_event_alert(
 # ─────────────────────────────────────────────────────────────────────────────
 
 @router.post("/otp")
-def generate_otp_for_user(
+async def generate_otp_for_user(
     current_user: models.User = Depends(security.get_current_user),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
     """
     Dashboard calls this to get an OTP the user can send to the bot.
@@ -131,7 +171,7 @@ def generate_otp_for_user(
         expires_at = expires_at,
         user_id    = current_user.id,
     ))
-    db.commit()
+    await db.commit()
     return {"otp": otp_code, "expires_at": expires_at.isoformat()}
 
 
@@ -140,19 +180,12 @@ def generate_otp_for_user(
 # ─────────────────────────────────────────────────────────────────────────────
 
 @router.post("/verify-otp", response_model=schemas.OTPVerifyResponse)
-def verify_otp(
+async def verify_otp(
     payload: schemas.OTPVerifyRequest,
     current_user: models.User = Depends(security.get_current_user),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
-    otp_record = (
-        db.query(models.TelegramOTP)
-        .filter(
-            models.TelegramOTP.otp_code == payload.otp_code,
-            models.TelegramOTP.used == False,
-        )
-        .first()
-    )
+    otp_record = await db.scalar(_UNUSED_OTP, {"otp_code": payload.otp_code})
 
     if not otp_record:
         raise HTTPException(status_code=400, detail="Invalid or expired OTP")
@@ -171,10 +204,9 @@ def verify_otp(
 
     otp_record.used = True
 
-    existing = (
-        db.query(models.TelegramLink)
-        .filter(models.TelegramLink.user_id == current_user.id)
-        .first()
+    existing = await db.scalar(
+        select(models.TelegramLink)
+        .where(models.TelegramLink.user_id == current_user.id)
     )
     if existing:
         existing.chat_id = otp_record.chat_id
@@ -186,7 +218,7 @@ def verify_otp(
             enabled = True,
         ))
 
-    db.commit()
+    await db.commit()
     return {"success": True, "chat_id": otp_record.chat_id}
 
 
@@ -197,7 +229,7 @@ def verify_otp(
 @router.post("/webhook")
 async def telegram_webhook(
     request: Request,
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_db),
 ):
     data = await request.json()
     update_id = data.get("update_id")
@@ -205,24 +237,20 @@ async def telegram_webhook(
         return {"status": "ignored"}
 
     # ── Idempotency guard ─────────────────────────────────────────────────
-    exists = (
-        db.query(models.TelegramUpdate)
-        .filter(models.TelegramUpdate.update_id == update_id)
-        .first()
-    )
-    if exists:
+    claimed = await db.scalar(_CLAIM_UPDATE, {"update_id": update_id})
+    if claimed is None:
         return {"status": "already_processed"}
 
-    db.add(models.TelegramUpdate(update_id=update_id))
-
     # ── Parse message ─────────────────────────────────────────────────────
     message = data.get("message")
     if not message:
-        db.commit()
+        await db.commit()
         return {"status": "ok"}
 
     chat_id = str(message["chat"]["id"])
     text    = message.get("text", "").strip()
+    arm_push: tuple[int, bool] | None = None   # sent to the agent after commit
+    stale_token: str | None = None              # token cache entry to drop after commit
 
     # ------------------------------------------------------------------
     # /start  → generate an OTP for the user to link in the dashboard
@@ -251,11 +279,11 @@ async def telegram_webhook(
     # /devices  → list the user's devices
     # ------------------------------------------------------------------
     elif text.startswith("/devices"):
-        link = _get_link(db, chat_id)
+        link = await _get_link(db, chat_id)
         if not link:
             await _send(chat_id, "❌ Account not linked. Send /start and enter the code on the dashboard.")
         else:
-            devices = db.query(models.Device).filter(models.Device.user_id == link.user_id).all()
+            devices = (await db.scalars(_DEVICES_BY_USER, {"user_id": link.user_id})).all()
             if not devices:
                 await _send(chat_id, "No devices found.")
             else:
@@ -272,12 +300,12 @@ async def telegram_webhook(
     elif text.startswith("/arm") or text.startswith("/disarm"):
         action_arm = text.startswith("/arm")
         parts      = text.split()
-        link       = _get_link(db, chat_id)
+        link       = await _get_link(db, chat_id)
 
         if not link:
             await _send(chat_id, "❌ Account not linked. Send /start and enter the code on the dashboard.")
         else:
-            devices = db.query(models.Device).filter(models.Device.user_id == link.user_id).all()
+            devices = (await db.scalars(_DEVICES_BY_USER, {"user_id": link.user_id})).all()
             if not devices:
                 await _send(chat_id, "No devices found.")
             else:
@@ -300,15 +328,22 @@ async def telegram_webhook(
                         )
                     else:
                         target.armed = action_arm
+                        stale_token = target.device_token
                         state = "🔒 ARMED" if action_arm else "🔓 DISARMED"
                         await _send(
                             chat_id,
                             f"✅ Device <b>{target.name or f'#{target.id}'}</b> is now {state}."
                         )
-                        # Push via WebSocket to the agent (non-blocking)
-                        asyncio.create_task(_push_arm_state(target, action_arm))
+                        arm_push = (target.id, action_arm)
 
-    db.commit()
+    await db.commit()
+    if stale_token:
+        invalidate_device_token(stale_token)
+
+    # Push only once the new state is committed, so a reconnecting agent can
+    # never be sent a state the database does not have yet.
+    if arm_push:
+        await _push_arm_state(*arm_push)
     return {"status": "ok"}
 
 
@@ -316,15 +351,8 @@ async def telegram_webhook(
 # Private helpers
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _get_link(db: Session, chat_id: str) -> models.TelegramLink | None:
-    return (
-        db.query(models.TelegramLink)
-        .filter(
-            models.TelegramLink.chat_id == chat_id,
-            models.TelegramLink.enabled == True,
-        )
-        .first()
-    )
+async def _get_link(db: AsyncSession, chat_id: str) -> models.TelegramLink | None:
+    return await db.scalar(_LINK_BY_CHAT, {"chat_id": chat_id})
 
 
 def _resolve_device(
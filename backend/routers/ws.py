@@ -6,18 +6,91 @@ Flow: connect → receive hello → send init → heartbeat loop
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, select, update
 from datetime import datetime, timezone
-import json
+import asyncio
+import orjson
 import logging
 
 from models import *
 from database import *
 import models, database
+from routers.devices import invalidate_device_token
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Connect/disconnect only need a few columns and one-row UPDATEs, so they
+# work on the table directly instead of loading Device ORM objects.
+_devices = models.Device.__table__
+_DEVICE_BY_TOKEN = select(
+    _devices.c.id,
+    _devices.c.confidence_threshold,
+    _devices.c.snapshot_enabled,
+    _devices.c.cooldown_sec,
+    _devices.c.control_mode,
+).where(_devices.c.device_token == bindparam("token"))
+_MARK_CONNECTED = (
+    update(_devices)
+    .where(_devices.c.id == bindparam("device_id"))
+    .values(armed=True, last_seen_at=bindparam("seen_at"))
+)
+_MARK_DISARMED = (
+    update(_devices)
+    .where(_devices.c.id == bindparam("device_id"))
+    .values(armed=False)
+)
+
+# Messages are encoded with orjson and still sent as text frames, which is
+# what the agent's websocket-client expects.
+def _dumps(payload: dict) -> str:
+    return orjson.dumps(payload).decode()
+
+_HEARTBEAT_ACK = _dumps({"type": "heartbeat_ack"})
+
+# Heartbeats only record last_seen_at in memory; the flush loop writes all of
+# them in one executemany UPDATE + COMMIT every LAST_SEEN_FLUSH_SEC seconds.
+# Keep this well under dashboard.ONLINE_WINDOW minus the heartbeat interval.
+LAST_SEEN_FLUSH_SEC = 5.0
+_last_seen: dict[int, datetime] = {}
+
+_TOUCH_LAST_SEEN = (
+    update(_devices)
+    .where(_devices.c.id == bindparam("device_id"))
+    .values(last_seen_at=bindparam("seen_at"))
+)
+
+
+async def flush_last_seen() -> None:
+    """Write all pending heartbeat timestamps in a single transaction."""
+    if not _last_seen:
+        return
+    # Snapshot + clear with no await in between, so no lock is needed
+    pending = dict(_last_seen)
+    _last_seen.clear()
+    try:
+        async with database.SessionLocal() as db:
+            await db.execute(_TOUCH_LAST_SEEN, [
+                {"device_id": d, "seen_at": ts} for d, ts in pending.items()
+            ])
+            await db.commit()
+    except BaseException:
+        # Put the batch back for the next flush; heartbeats that arrived in
+        # the meantime are newer and win.
+        for device_id, ts in pending.items():
+            _last_seen.setdefault(device_id, ts)
+        raise
+
+
+async def last_seen_flush_loop() -> None:
+    """Background task started by main.py's lifespan handler."""
+    while True:
+        await asyncio.sleep(LAST_SEEN_FLUSH_SEC)
+        try:
+            await flush_last_seen()
+        except Exception as e:
+            logger.error(f"Failed to flush heartbeat timestamps: {e}")
+
 
 class ConnectionManager:
     """Manages active WebSocket connections keyed by device_id."""
@@ -29,7 +102,14 @@ class ConnectionManager:
         self.active[device_id] = websocket
         logger.info(f"Device {device_id} connected via WS")
 
-    def disconnect(self, device_id: int):
+    def disconnect(self, device_id: int, websocket: WebSocket | None = None):
+        """
+        Forget a device's socket. When `websocket` is given, only that socket is
+        removed — a stale connection (or a failed push to it) must not drop the
+        agent's newer connection after a quick reconnect.
+        """
+        if websocket is not None and self.active.get(device_id) is not websocket:
+            return
         self.active.pop(device_id, None)
         logger.info(f"Device {device_id} disconnected from WS")
 
@@ -39,11 +119,11 @@ class ConnectionManager:
         if not ws:
             return False
         try:
-            await ws.send_json(payload)
+            await ws.send_text(_dumps(payload))
             return True
         except Exception as e:
             logger.warning(f"WS push to device {device_id} failed: {e}")
-            self.disconnect(device_id)
+            self.disconnect(device_id, ws)
             return False
 
 
@@ -71,54 +151,50 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close(code=4001, reason="Missing X-Device-Token header")
         return
 
-    # ── Open a fresh DB session for this connection ───────────────────────
-    db: Session = next(database.get_db())
     device_id: int | None = None
 
     try:
-        device = db.query(models.Device).filter(
-            models.Device.device_token == device_token
-        ).first()
-
-        if not device:
-            await websocket.close(code=4003, reason="Invalid device token")
-            return
-
-        device_id = device.id
-        await websocket.accept()
-        await manager.connect(websocket, device_id)
-
-        # ── Send init ─────────────────────────────────────────────────────
-        device.armed = True
-        init_payload = {
-            "type": "init",
-            "armed": device.armed,
-            "config": {
-                "confidence_threshold": device.confidence_threshold,
-                "snapshot_enabled":    device.snapshot_enabled,
-                "cooldown_sec":        device.cooldown_sec,
-                "control_mode":        device.control_mode,
-            },
-        }
-        await websocket.send_json(init_payload)
-
-        # ── Update last_seen ──────────────────────────────────────────────
-        device.last_seen_at = datetime.now(timezone.utc)
-        db.commit()
+        # ── Short-lived DB session for the handshake ──────────────────────
+        async with database.SessionLocal() as db:
+            device = (await db.execute(_DEVICE_BY_TOKEN, {"token": device_token})).first()
+
+            if not device:
+                await websocket.close(code=4003, reason="Invalid device token")
+                return
+
+            device_id = device.id
+            await websocket.accept()
+            await manager.connect(websocket, device_id)
+
+            # ── Send init ─────────────────────────────────────────────────
+            init_payload = {
+                "type": "init",
+                "armed": True,
+                "config": {
+                    "confidence_threshold": device.confidence_threshold,
+                    "snapshot_enabled":    device.snapshot_enabled,
+                    "cooldown_sec":        device.cooldown_sec,
+                    "control_mode":        device.control_mode,
+                },
+            }
+            await websocket.send_text(_dumps(init_payload))
+
+            # ── Arm + update last_seen ────────────────────────────────────
+            await db.execute(_MARK_CONNECTED, {
+                "device_id": device_id,
+                "seen_at":   datetime.now(timezone.utc),
+            })
+            await db.commit()
+        invalidate_device_token(device_token)
 
         # ── Heartbeat loop ────────────────────────────────────────────────
         while True:
             raw = await websocket.receive_text()
-            msg = json.loads(raw)
+            msg = orjson.loads(raw)
 
             if msg.get("type") == "heartbeat":
-                device = db.query(models.Device).filter(
-                    models.Device.id == device_id
-                ).first()
-                if device:
-                    device.last_seen_at = datetime.now(timezone.utc)
-                    db.commit()
-                await websocket.send_json({"type": "heartbeat_ack"})
+                _last_seen[device_id] = datetime.now(timezone.utc)
+                await websocket.send_text(_HEARTBEAT_ACK)
 
     except WebSocketDisconnect:
         pass
@@ -126,15 +202,12 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.error(f"WS error for device {device_id}: {e}")
     finally:
         if device_id:
-            manager.disconnect(device_id)
+            manager.disconnect(device_id, websocket)
             # Auto-disarm on disconnect
             try:
-                db_cleanup = next(database.get_db())
-                dev = db_cleanup.query(models.Device).filter(models.Device.id == device_id).first()
-                if dev:
-                    dev.armed = False
-                    db_cleanup.commit()
-                db_cleanup.close()
+                async with database.SessionLocal() as db_cleanup:
+                    await db_cleanup.execute(_MARK_DISARMED, {"device_id": device_id})
+                    await db_cleanup.commit()
+                invalidate_device_token(device_token)
             except Exception as e:
                 logger.error(f"Failed to auto-disarm device {device_id}: {e}")
-        db.close()
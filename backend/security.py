@@ -1,10 +1,18 @@
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta
 from typing import Optional
+import base64
+import hashlib
+import hmac
+import time
+import orjson
 from jose import JWTError, jwt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 
@@ -16,26 +24,53 @@ SECRET_KEY = os.environ.get("JWT_SECRET", "super-secret-default-key-please-chang
 ALGORITHM = os.environ.get("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("JWT_EXPIRE_MINUTES", 60 * 24 * 7))
 
+# Argon2id for all new hashes — one shared, pre-tuned hasher per process.
+# The bcrypt context is only kept to verify hashes created before the switch.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2)
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+_USER_BY_EMAIL = select(models.User).where(models.User.email == bindparam("email"))
+
 def verify_password(plain_password, hashed_password):
+    if hashed_password.startswith("$argon2"):
+        try:
+            return password_hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
+
+def password_needs_rehash(hashed_password):
+    """True for legacy bcrypt hashes or Argon2 hashes with outdated parameters."""
+    if not hashed_password.startswith("$argon2"):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+# HS256 tokens are assembled directly: the header never changes, and the HMAC
+# key schedule is computed once here and .copy()-ed for every token.
+_JWT_HEADER_B64 = _b64url(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
+_JWT_SIGNER = hmac.new(SECRET_KEY.encode(), digestmod=hashlib.sha256)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
-
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    ttl = expires_delta if expires_delta else timedelta(minutes=15)
+    to_encode["exp"] = int(time.time() + ttl.total_seconds())
+
+    if ALGORITHM != "HS256":
+        return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+    msg = _JWT_HEADER_B64 + b"." + _b64url(orjson.dumps(to_encode))
+    sig = _JWT_SIGNER.copy()
+    sig.update(msg)
+    return (msg + b"." + _b64url(sig.digest())).decode("ascii")
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -48,7 +83,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await db.scalar(_USER_BY_EMAIL, {"email": email})
     if user is None:
         raise credentials_exception
     return user